@@ -4,24 +4,26 @@ from pathlib import Path
 
 # Changable Variables
 
+cache_dir = "./.cache"  # change to desired transcription cache folder name
+cache_max_mb = 2048  # change to desired transcription cache size limit (MB)
 force_debug_mode = False  # change to True to force debug mode
 ffmpeg_dir = (
     "./assets/ffmpeg"  # change to absolute or relative path to ffmpeg binary
 )
+file_types_config = "filetypes.ini"  # change to your own list of file types
 log_folder_name = ".logs"  # change to desired log folder name
+log_format = "text"  # change to "json" for JSON lines log output
+model_dtype = "fp32"  # change to "fp16" (GPU) or "int8" (CPU)
+model_cache_mb = 4096  # change to desired memory budget for loaded models
 scratch_dir = "./scratch"  # change to desired scratch folder name
+scratch_tmpfs = False  # change to True to put small intermediates in /dev/shm
+scratch_tmpfs_mb = 256  # change to the largest intermediate kept in /dev/shm
 
 
 # Changable But Not Recommended To Change Variables
 # (unless you know what you're doing)
 
 
-audio_file_types_ffmpeg = (
-    ".3g2,.3gp,.aac,.ac3,.flac,.m4a,.m4b,.m4r,.mka,.mp3,.mp4,.ogg,"
-    ".ga,.opus,.ra,.ram,.wav,.wma"
-)
-audio_file_types_whisper = ".flac,.m4a,.mp3,.ogg,.wav"
-
 ffmpeg_linux_binary_download_url = (
     "https://johnvansickle.com/ffmpeg/releases/"
     "ffmpeg-release-amd64-static.tar.xz"
@@ -32,25 +34,25 @@ ffmpeg_win_binary_download_url = (
     "latest/ffmpeg-master-latest-win64-gpl.zip"
 )  # .zip
 
-video_file_types_ffmpeg = (
-    ".3g2,.3gp,.asf,.avi,.dv,.f4v,.flv,.m2ts,.m4v,.mkv,.mov,.mp4,"
-    ".mpeg,.mpg,.mts,.mxf,.ogv,.rm,.rmvb,.ts,.vob,.webm,.wmv"
-)
-video_file_types_moviepy = ".avi,.mkv,.mov,.mp4,.ogv"
-
 # *** DO NOT EDIT BELOW THIS LINE ***
 
-os.environ["FFMPEG_AUDIO_TYPES"] = audio_file_types_ffmpeg
+os.environ["CACHE_DIR"] = cache_dir if cache_dir else "./.cache"
+os.environ["CACHE_MAX_MB"] = str(cache_max_mb)
 os.environ["FFMPEG_DIR"] = ffmpeg_dir if ffmpeg_dir else "./ffmpeg"
 os.environ["FFMPEG_LINUX"] = ffmpeg_linux_binary_download_url
 os.environ["FFMPEG_MAC"] = ffmpeg_mac_binary_download_url
-os.environ["FFMPEG_VIDEO_TYPES"] = video_file_types_ffmpeg
 os.environ["FFMPEG_WIN"] = ffmpeg_win_binary_download_url
+os.environ["FILE_TYPES_CONFIG"] = (
+    file_types_config if file_types_config else "filetypes.ini"
+)
 os.environ["FORCE_DEBUG"] = "False" if not force_debug_mode else "True"
 os.environ["LOG_DIR"] = log_folder_name if log_folder_name else ".logs"
+os.environ["LOG_FORMAT"] = log_format if log_format else "text"
 os.environ["LOCAL_TEMP"] = scratch_dir if scratch_dir else "./scratch"
-os.environ["MOVIEPY_VIDEO_TYPES"] = video_file_types_moviepy
-os.environ["WHISPER_AUDIO_TYPES"] = audio_file_types_whisper
+os.environ["MODEL_CACHE_MB"] = str(model_cache_mb)
+os.environ["MODEL_DTYPE"] = model_dtype if model_dtype else "fp32"
+os.environ["SCRATCH_TMPFS"] = "True" if scratch_tmpfs else "False"
+os.environ["SCRATCH_TMPFS_MB"] = str(scratch_tmpfs_mb)
 
 current_path = Path(__file__).resolve()
 parent_path = current_path.parent
@@ -59,7 +61,6 @@ sys.path.append(str(parent_path))
 
 if __name__ == "__main__":
     import argparse
-    from core.app import main as process
 
     # TODO: Fix the FFMPEG download
     # from core.filer import dir_check
@@ -78,6 +79,51 @@ if __name__ == "__main__":
         description="Transcription of " "video/audio files"
     )
     parser.add_argument("-f", "--file", help="Path to the video/audio file")
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=str,
+        help="Directory, glob pattern or list file of video/audio files "
+        "to transcribe with a single loaded model",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunk",
+        type=float,
+        default=0,
+        help="Split long audio at silences into chunks of about this many "
+        "seconds (at least 2) and transcribe them in parallel "
+        "(default: 0, off)",
+    )
+    parser.add_argument(
+        "--chunk-workers",
+        type=int,
+        default=2,
+        help="Number of worker processes for chunked transcription of a "
+        "single file, 1 runs chunks in process; batch runs always use "
+        "their loaded model in process (default: 2)",
+    )
+    parser.add_argument(
+        "--crawl-workers",
+        type=int,
+        default=16,
+        help="Threads listing directories when --batch is a directory; "
+        "raise it for high-latency network mounts (default: 16)",
+    )
+    parser.add_argument(
+        "--dtype",
+        type=str,
+        choices=["fp32", "fp16", "int8"],
+        help="Model precision: fp16 on GPU or dynamic int8 quantization of "
+        "the linear layers on CPU "
+        f"(default: {os.environ['MODEL_DTYPE']})",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only transcribe batch files that are new or changed since "
+        "they were last transcribed with the same model and language",
+    )
     parser.add_argument(
         "-l",
         "--language",
@@ -103,10 +149,68 @@ if __name__ == "__main__":
         "-t",
         "--type",
         type=int,
-        choices=[0, 1, 2],
-        default=2,
+        nargs="+",
+        choices=[0, 1, 2, 3, 4],
+        default=[2],
         help="The output format (0: transcript only, "
-        "1: transcript with time, 2: .srt file)",
+        "1: transcript with time, 2: .srt file, 3: .vtt file, "
+        "4: .json file with word timings). Several formats can be given "
+        "and are all written from one transcription",
+    )
+    parser.add_argument(
+        "--prometheus",
+        type=str,
+        help="Write per-stage totals in Prometheus text format to this path",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Maximum number of queued server jobs before new submissions "
+        "are rejected with 503 (default: 16)",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        help="Write a JSON line per job with per-stage timings, I/O bytes "
+        "and peak memory to this path",
+    )
+    parser.add_argument(
+        "--serve",
+        type=str,
+        help="Run as a transcription server on [HOST:]PORT, keeping the "
+        "model loaded between jobs",
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="Run as a transcription server on this Unix socket path",
+    )
+    parser.add_argument(
+        "--stream",
+        type=int,
+        default=0,
+        help="Audio stream to transcribe in files with several audio "
+        "tracks, counted from 0 (default: 0)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Torch intra-op threads per process holding a model "
+        "(default: torch default, or CPU cores divided by workers)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Write the stage timings as a Chrome trace (chrome://tracing, "
+        "Perfetto) to this path",
+    )
+    parser.add_argument(
+        "--tracks",
+        type=str,
+        help="Transcribe several audio streams from one decode pass: "
+        "'all', or stream numbers with an optional language each "
+        "(e.g. 0,2:de). One output per track is written",
     )
     parser.add_argument(
         "-v",
@@ -116,6 +220,40 @@ if __name__ == "__main__":
         default=0,
         help="Verbose output (0: off, 1: on)",
     )
+    parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="Skip silence before transcription with an energy-based "
+        "voice activity detector",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of batch worker processes, each holding its own "
+        "loaded model (default: 1)",
+    )
     args = parser.parse_args()
 
-    process(args)
+    # precision and thread settings reach spawned workers through the
+    # environment, like the rest of the configuration above
+    if args.dtype:
+        os.environ["MODEL_DTYPE"] = args.dtype
+    if args.threads:
+        os.environ["TORCH_THREADS"] = str(args.threads)
+
+    # entry points are imported after parsing so --help and argument
+    # errors never pay for loading the pipeline modules
+    if args.serve or args.socket:
+        from core.server import serve
+
+        serve(args)
+    elif args.batch:
+        from core.batch import batch_main as batch_process
+
+        batch_process(args)
+    else:
+        from core.app import main as process
+
+        process(args)
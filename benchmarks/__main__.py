@@ -0,0 +1,7 @@
+import sys
+
+
+from pipeline import main
+
+
+sys.exit(main())
@@ -0,0 +1,87 @@
+import json
+import os
+import platform
+import resource
+import runpy
+import subprocess
+import sys
+
+
+from pathlib import Path
+from typing import Any
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_audio_fixture(path: str, seconds: float, channels: int = 2) -> str:
+    # 440 Hz tone mixed with pink noise, so encoders cannot cheat on silence
+    filter_graph = (
+        f"sine=frequency=440:sample_rate=44100:duration={seconds}[tone];"
+        "anoisesrc=color=pink:sample_rate=44100:amplitude=0.05:"
+        f"duration={seconds}[noise];"
+        "[tone][noise]amix=inputs=2"
+    )
+    run_ffmpeg(
+        ["-filter_complex", filter_graph, "-ac", str(channels), path]
+    )
+    return path
+
+
+def make_video_fixture(path: str, seconds: float) -> str:
+    # a small test pattern keeps encoding cheap; only the container matters
+    run_ffmpeg(
+        [
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc=size=320x240:rate=25:duration={seconds}",
+            "-filter_complex",
+            f"sine=frequency=440:sample_rate=44100:duration={seconds}[tone];"
+            "anoisesrc=color=pink:sample_rate=44100:amplitude=0.05:"
+            f"duration={seconds}[noise];"
+            "[tone][noise]amix=inputs=2[audio]",
+            "-map",
+            "0:v",
+            "-map",
+            "[audio]",
+            "-ac",
+            "2",
+            "-shortest",
+            path,
+        ]
+    )
+    return path
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if platform.system() == "Darwin" else peak * 1024
+
+
+def print_json(data: Any) -> None:
+    print(json.dumps(data, indent=2, default=str))
+
+
+def run_ffmpeg(arguments: list[str]) -> None:
+    from core.utils import get_ffmpeg_path
+
+    command = [
+        get_ffmpeg_path(),
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+    ] + arguments
+    subprocess.run(command, check=True)
+
+
+def setup_environment() -> None:
+    # reuse the configuration block of __main__.py without running the CLI
+    runpy.run_path(str(ROOT / "__main__.py"), run_name="benchmark")
+    os.environ["PATH"] += os.pathsep + os.path.abspath(
+        os.environ.get("FFMPEG_DIR", "./ffmpeg")
+    )
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
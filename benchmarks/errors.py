@@ -0,0 +1,148 @@
+"""Cost of error capture when files fail in a batch.
+
+Usage: python benchmarks/errors.py [--files 1000] [--budget 1.0]
+
+Every simulated file fails three calls deep while a large decoded-audio
+sized argument is on the stack, and each level catches and re-raises the
+way the core modules do. The old frame-introspection capture (kept here as
+legacy_zerr for comparison) stringifies every argument at every level; the
+current one must stay within the budget for the whole batch.
+"""
+import argparse
+import inspect
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+
+from common import print_json, setup_environment
+
+
+def legacy_zerr(e: Exception) -> str:
+    error_frame = inspect.currentframe().f_back  # type: ignore[union-attr]
+    arg_info = inspect.getargvalues(error_frame)  # type: ignore[arg-type]
+    function_args_str = ", ".join(
+        f"{arg}={error_frame.f_locals[arg]}"  # type: ignore[union-attr]
+        for arg in arg_info.args
+    )
+    filename, line_no, function_name, line = traceback.extract_tb(
+        e.__traceback__
+    )[-1]
+    return (
+        f"[{filename}:{line_no}]|"
+        f"[{function_name}({function_args_str}):"
+        f"{error_frame.f_lineno}]|"  # type: ignore[union-attr]
+        f"[{line}]|[error:{e}]"
+    )
+
+
+def run_legacy(files: int, audio: list[float]) -> float:
+    from core.logger import log
+
+    def decode(audio: list[float]) -> None:
+        try:
+            raise Exception("ffmpeg failed to decode audio")
+        except Exception as e:
+            error_info = legacy_zerr(e)
+            log(error_info, "ERROR")
+            raise Exception(error_info)
+
+    def transcribe(audio: list[float], model: str) -> None:
+        try:
+            decode(audio)
+        except Exception as e:
+            error_info = legacy_zerr(e)
+            log(error_info, "ERROR")
+            raise Exception(error_info)
+
+    def process(file_path: str, audio: list[float]) -> None:
+        try:
+            transcribe(audio, "base")
+        except Exception as e:
+            error_info = legacy_zerr(e)
+            log(error_info, "ERROR")
+            raise Exception(error_info)
+
+    return run_batch(process, files, audio)
+
+
+def run_batch(process, files: int, audio: list[float]) -> float:
+    batch_start = time.perf_counter()
+    for index in range(files):
+        try:
+            process(f"file_{index}.wav", audio)
+        except Exception:
+            pass
+    return time.perf_counter() - batch_start
+
+
+def run_current(files: int, audio: list[float]) -> float:
+    from core.zerr import zraise
+
+    def decode(audio: list[float]) -> None:
+        try:
+            raise Exception("ffmpeg failed to decode audio")
+        except Exception as e:
+            raise zraise(e)
+
+    def transcribe(audio: list[float], model: str) -> None:
+        try:
+            decode(audio)
+        except Exception as e:
+            raise zraise(e)
+
+    def process(file_path: str, audio: list[float]) -> None:
+        try:
+            transcribe(audio, "base")
+        except Exception as e:
+            raise zraise(e)
+
+    return run_batch(process, files, audio)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--budget", type=float, default=1.0)
+    parser.add_argument(
+        "--legacy-files",
+        type=int,
+        default=20,
+        help="files to run through the old capture, which is much slower",
+    )
+    args = parser.parse_args()
+
+    setup_environment()
+    from core.logger import flush_log
+
+    # one minute of 16 kHz audio as a plain list keeps numpy out of it
+    audio = [0.0] * (16000 * 60)
+    with tempfile.TemporaryDirectory() as log_dir:
+        os.environ["LOG_DIR"] = log_dir
+        legacy_seconds = run_legacy(args.legacy_files, audio)
+        current_seconds = run_current(args.files, audio)
+        flush_log()
+
+    within_budget = current_seconds <= args.budget
+    print_json(
+        {
+            "files": args.files,
+            "current_seconds": round(current_seconds, 4),
+            "current_ms_per_failure": round(
+                current_seconds * 1000 / args.files, 4
+            ),
+            "legacy_files": args.legacy_files,
+            "legacy_ms_per_failure": round(
+                legacy_seconds * 1000 / max(1, args.legacy_files), 4
+            ),
+            "budget_seconds": args.budget,
+            "within_budget": within_budget,
+        }
+    )
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
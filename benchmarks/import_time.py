@@ -0,0 +1,107 @@
+"""Import-time budget for the CLI entry point and the core modules.
+
+Usage: python benchmarks/import_time.py [--repeat 5]
+
+Each module is imported in a fresh interpreter with `python -X importtime`
+and the best cumulative time over the repeats is compared with its budget.
+Exits non-zero if any module goes over, e.g. after a heavy dependency is
+imported at module level again.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+
+from common import print_json, ROOT
+
+
+BUDGETS_MS = {
+    "core.app": 150,
+    "core.batch": 150,
+    "core.logger": 30,
+    "core.server": 200,
+    "core.transcribe": 125,
+    "core.utils": 75,
+}
+HELP_BUDGET_MS = 400
+HEAVY_MODULES = (
+    "icecream",
+    "numpy",
+    "requests",
+    "srt",
+    "tkinter",
+    "torch",
+    "whisper_timestamped",
+)
+
+
+def measure_help() -> float:
+    help_start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(ROOT / "__main__.py"), "--help"],
+        capture_output=True,
+        check=True,
+    )
+    return (time.perf_counter() - help_start) * 1000
+
+
+def measure_module(module: str) -> tuple[float, list[str]]:
+    code = (
+        "import runpy, sys; "
+        f"runpy.run_path({str(ROOT / '__main__.py')!r}, run_name='bench'); "
+        f"import {module}; "
+        f"print(','.join(m for m in sys.modules "
+        f"if m.split('.')[0] in {HEAVY_MODULES!r}))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        cwd=ROOT,
+        text=True,
+    )
+    cumulative_us = 0
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            cumulative_us = int(fields[1])
+    heavy = [name for name in completed.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, heavy
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    within_budget = True
+    for module, budget in BUDGETS_MS.items():
+        timings = [measure_module(module) for _ in range(args.repeat)]
+        best = min(milliseconds for milliseconds, _ in timings)
+        heavy = timings[0][1]
+        ok = best <= budget and not heavy
+        within_budget = within_budget and ok
+        results[module] = {
+            "cumulative_ms": round(best, 2),
+            "budget_ms": budget,
+            "heavy_imports": heavy,
+            "ok": ok,
+        }
+
+    help_ms = min(measure_help() for _ in range(args.repeat))
+    within_budget = within_budget and help_ms <= HELP_BUDGET_MS
+    results["__main__ --help"] = {
+        "wall_ms": round(help_ms, 2),
+        "budget_ms": HELP_BUDGET_MS,
+        "ok": help_ms <= HELP_BUDGET_MS,
+    }
+
+    print_json({"results": results, "within_budget": within_budget})
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
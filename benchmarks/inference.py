@@ -0,0 +1,153 @@
+"""Real-time factor and word error rate of each inference configuration.
+
+Usage: python benchmarks/inference.py [--audio FILE] [--reference FILE]
+           [--model tiny] [--dtype fp32 int8] [--threads 1 4]
+           [--output FILE]
+
+Every dtype x thread count combination loads its own model and transcribes
+the same audio. The real-time factor is transcription wall time / audio
+duration. Without --audio a tone+noise fixture is generated with ffmpeg; it
+has no speech, so only speed is meaningful. Word error rate is measured
+against the --reference transcript when one is given, otherwise against the
+first configuration's output, which shows how far the cheaper settings
+drift from the baseline.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+from typing import Any, Optional
+
+
+from common import make_audio_fixture, print_json, setup_environment
+
+
+def get_words(text: str) -> list[str]:
+    return "".join(
+        character if character.isalnum() or character.isspace() else " "
+        for character in text.lower()
+    ).split()
+
+
+def get_word_error_rate(reference: str, hypothesis: str) -> Optional[float]:
+    reference_words = get_words(reference)
+    hypothesis_words = get_words(hypothesis)
+    if not reference_words:
+        return None
+    # word-level Levenshtein distance, one row at a time
+    previous = list(range(len(hypothesis_words) + 1))
+    for index, reference_word in enumerate(reference_words, 1):
+        current = [index]
+        for column, hypothesis_word in enumerate(hypothesis_words, 1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1]
+                    + (reference_word != hypothesis_word),
+                )
+            )
+        previous = current
+    return previous[-1] / len(reference_words)
+
+
+def run_config(
+    audio: Any, model_name: str, dtype: str, threads: int
+) -> dict[str, Any]:
+    import torch
+
+    from core.audio import SAMPLE_RATE
+    from core.transcribe import get_model_dtype, load_model, transcribe_audio
+
+    os.environ["MODEL_DTYPE"] = dtype
+    os.environ["TORCH_THREADS"] = str(threads)
+    resolved_dtype = get_model_dtype(device="cpu")
+
+    load_start = time.perf_counter()
+    model = load_model(model_name, "cpu", resolved_dtype)
+    load_seconds = time.perf_counter() - load_start
+
+    transcribe_start = time.perf_counter()
+    result = transcribe_audio(audio, model_name, "en", model=model)
+    transcribe_seconds = time.perf_counter() - transcribe_start
+    audio_seconds = len(audio) / SAMPLE_RATE
+    return {
+        "dtype": dtype,
+        "resolved_dtype": resolved_dtype,
+        "threads": torch.get_num_threads(),
+        "load_seconds": round(load_seconds, 3),
+        "transcribe_seconds": round(transcribe_seconds, 3),
+        "real_time_factor": round(transcribe_seconds / audio_seconds, 4)
+        if audio_seconds > 0
+        else None,
+        "text": result["text"].strip(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", type=str, help="speech recording to use")
+    parser.add_argument(
+        "--reference", type=str, help="reference transcript of --audio"
+    )
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--model", type=str, default="tiny")
+    parser.add_argument(
+        "--dtype",
+        nargs="+",
+        choices=["fp32", "fp16", "int8"],
+        default=["fp32", "int8"],
+    )
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        default=sorted({1, os.cpu_count() or 1}),
+    )
+    parser.add_argument("--output", type=str, help="also write JSON here")
+    args = parser.parse_args()
+
+    setup_environment()
+    from core.audio import decode_audio
+
+    reference = None
+    if args.reference:
+        with open(args.reference, "r", encoding="utf-8") as f:
+            reference = f.read()
+
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        audio_path = args.audio or make_audio_fixture(
+            os.path.join(fixture_dir, "tone.wav"), args.seconds
+        )
+        audio = decode_audio(audio_path)
+
+    results = []
+    for dtype in args.dtype:
+        for threads in args.threads:
+            results.append(run_config(audio, args.model, dtype, threads))
+
+    baseline = reference if reference is not None else results[0]["text"]
+    for result in results:
+        result["word_error_rate"] = get_word_error_rate(
+            baseline, result["text"]
+        )
+
+    report = {
+        "model": args.model,
+        "audio": args.audio or "generated tone",
+        "wer_against": "reference" if reference is not None else "baseline",
+        "configs": results,
+    }
+    print_json(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Peak RSS of decode_audio as input length grows.
+
+Usage: python benchmarks/memory.py [--seconds 60 600 1800]
+
+Each measurement runs in a fresh interpreter so peaks do not carry over.
+decode_audio has to hold its 16 kHz mono float32 output (4 bytes per
+sample); the peak must grow no faster than that, i.e. no raw PCM copy or
+float temporaries of the whole input are held alongside it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+from common import (
+    make_audio_fixture,
+    peak_rss_bytes,
+    print_json,
+    setup_environment,
+)
+
+
+LINEAR_TOLERANCE = 1.25
+OUTPUT_BYTES_PER_SECOND = 16000 * 4
+
+
+def measure(filepath: str) -> None:
+    setup_environment()
+    from core.audio import decode_audio
+    from core.probe import probe_media
+
+    # the probe is cached before decoding, as in get_audio_path
+    probe_media(filepath)
+    baseline = peak_rss_bytes()
+    decode_audio(filepath)
+    print(json.dumps({"baseline": baseline, "peak": peak_rss_bytes()}))
+
+
+def run_measure(filepath: str) -> dict[str, int]:
+    completed = subprocess.run(
+        [sys.executable, __file__, "--measure", filepath],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--seconds", type=float, nargs="+", default=[60, 600, 1800]
+    )
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure)
+        return 0
+
+    setup_environment()
+    results = []
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        os.environ["LOCAL_TEMP"] = fixture_dir
+        for seconds in sorted(args.seconds):
+            fixture = make_audio_fixture(
+                os.path.join(fixture_dir, f"tone_{int(seconds)}s.aac"),
+                seconds,
+            )
+            measured = run_measure(fixture)
+            results.append(
+                {
+                    "seconds": seconds,
+                    "expected_output_bytes": int(
+                        seconds * OUTPUT_BYTES_PER_SECOND
+                    ),
+                    "growth_bytes": measured["peak"] - measured["baseline"],
+                    **measured,
+                }
+            )
+            os.remove(fixture)
+
+    # fixed costs cancel out between the shortest and longest input
+    first, last = results[0], results[-1]
+    expected = last["expected_output_bytes"] - first["expected_output_bytes"]
+    growth = last["growth_bytes"] - first["growth_bytes"]
+    linear = growth <= expected * LINEAR_TOLERANCE
+    print_json(
+        {
+            "results": results,
+            "bytes_per_second": growth / (last["seconds"] - first["seconds"])
+            if len(results) > 1
+            else None,
+            "expected_bytes_per_second": OUTPUT_BYTES_PER_SECOND,
+            "decode_audio_linear": linear,
+        }
+    )
+    return 0 if linear else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""End-to-end pipeline benchmark, one measurement per stage of core.app.main.
+
+Usage: python benchmarks [--seconds 30] [--model tiny] [--output FILE]
+
+Fixtures (a tone+noise WAV plus .mkv and .ts containers carrying the same
+audio) are generated locally with ffmpeg. Every stage reports wall time,
+CPU time (including ffmpeg child processes), peak RSS and real-time factor
+(stage wall time / audio duration) as JSON, so runs can be compared across
+commits.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+from typing import Any, Callable
+
+
+from common import (
+    make_audio_fixture,
+    make_video_fixture,
+    peak_rss_bytes,
+    print_json,
+    ROOT,
+    setup_environment,
+)
+
+
+DETECTION_REPEAT = 1000
+
+
+def get_commit() -> str:
+    completed = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        capture_output=True,
+        cwd=ROOT,
+        text=True,
+    )
+    return completed.stdout.strip() if completed.returncode == 0 else ""
+
+
+def measure(
+    stage: str, audio_seconds: float, function: Callable[[], Any]
+) -> tuple[dict[str, Any], Any]:
+    self_start = resource.getrusage(resource.RUSAGE_SELF)
+    children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+    wall_start = time.perf_counter()
+    value = function()
+    wall = time.perf_counter() - wall_start
+    self_end = resource.getrusage(resource.RUSAGE_SELF)
+    children_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (
+        self_end.ru_utime
+        - self_start.ru_utime
+        + self_end.ru_stime
+        - self_start.ru_stime
+        + children_end.ru_utime
+        - children_start.ru_utime
+        + children_end.ru_stime
+        - children_start.ru_stime
+    )
+    return {
+        "stage": stage,
+        "wall_seconds": round(wall, 6),
+        "cpu_seconds": round(cpu, 6),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "real_time_factor": round(wall / audio_seconds, 6)
+        if audio_seconds > 0
+        else None,
+    }, value
+
+
+def run_fixture(
+    fixture: str, seconds: float, model: Any, args: argparse.Namespace
+) -> list[dict[str, Any]]:
+    from core.audio import decode_audio
+    from core.filetypes import classify
+    from core.probe import probe_media
+    from core.transcribe import process_transcription, transcribe_audio
+    from core.writers import iter_transcription, write_stream
+
+    def detect() -> str:
+        for _ in range(DETECTION_REPEAT):
+            kind = classify(fixture)
+        return kind or "audio"
+
+    stages = []
+    stage, _ = measure("format_detection", seconds, detect)
+    stage["calls"] = DETECTION_REPEAT
+    stages.append(stage)
+    stage, _ = measure("probe", seconds, lambda: probe_media(fixture))
+    stages.append(stage)
+
+    stage, audio = measure(
+        "decode_audio", seconds, lambda: decode_audio(fixture)
+    )
+    stages.append(stage)
+
+    if model is None:
+        return stages
+
+    stage, result = measure(
+        "transcription",
+        seconds,
+        lambda: transcribe_audio(audio, args.model, "en", model=model),
+    )
+    stages.append(stage)
+    stage, _ = measure(
+        "process_transcription",
+        seconds,
+        lambda: [
+            process_transcription(result, type, "en") for type in range(5)
+        ],
+    )
+    stages.append(stage)
+
+    def write() -> None:
+        with tempfile.TemporaryDirectory() as output_dir:
+            for type in range(5):
+                with open(os.path.join(output_dir, str(type)), "w") as f:
+                    write_stream(iter_transcription(result, type, "en"), f)
+
+    stage, _ = measure("write", seconds, write)
+    stages.append(stage)
+    return stages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--model", type=str, default="tiny")
+    parser.add_argument(
+        "--no-model",
+        action="store_true",
+        help="skip model load and transcription stages",
+    )
+    parser.add_argument("--output", type=str, help="also write JSON here")
+    args = parser.parse_args()
+
+    setup_environment()
+    report: dict[str, Any] = {
+        "commit": get_commit(),
+        "audio_seconds": args.seconds,
+        "model": None if args.no_model else args.model,
+        "fixtures": {},
+    }
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        os.environ["LOCAL_TEMP"] = fixture_dir
+        fixtures = [
+            make_audio_fixture(
+                os.path.join(fixture_dir, "tone.wav"), args.seconds
+            ),
+            make_video_fixture(
+                os.path.join(fixture_dir, "tone.mkv"), args.seconds
+            ),
+            make_video_fixture(
+                os.path.join(fixture_dir, "tone.ts"), args.seconds
+            ),
+        ]
+
+        model = None
+        if not args.no_model:
+            from core.transcribe import load_model
+
+            stage, model = measure(
+                "model_load", args.seconds, lambda: load_model(args.model)
+            )
+            report["model_load"] = stage
+
+        for fixture in fixtures:
+            report["fixtures"][os.path.basename(fixture)] = run_fixture(
+                fixture, args.seconds, model, args
+            )
+
+    print_json(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,80 @@
+import os
+import time
+
+
 from argparse import Namespace
+from typing import Any, Optional
 
 
-from core.audio import get_audio_path
+from core.audio import decode_audio_streams, get_audio_path, SAMPLE_RATE
+from core.cache import (
+    cache_lookup,
+    cache_store,
+    get_cache_key,
+    get_cache_options,
+    get_content_hash,
+)
+from core.checkpoint import clear_checkpoints
+from core.chunking import (
+    transcribe_chunked,
+    transcribe_tracks as transcribe_audio_tracks,
+)
 from core.filer import (
-    check_for_last_cache,
     file_check,
-    generate_cache_file as get_cache_path,
     get_file_path as get_path,
-    get_output_path,
-    scratch_cleanup,
+    get_output_paths,
     write_to_file_with_ask as write_output,
 )
 from core.logger import log
+from core.metrics import (
+    finish_job_report,
+    span,
+    start_job_report,
+    write_reports,
+)
+from core.probe import probe_media
+from core.scratch import job_scratch
+from core.tracks import get_tracks
 from core.transcribe import (
+    get_audio_duration,
     get_language as get_lang,
-    get_transcription_type as get_tx_type,
+    get_transcription_types as get_tx_types,
     transcribe_audio,
-    process_transcription as process_tx,
 )
 from core.utils import (
-    cache_loader,
-    cache_saver,
-    file_timestamp,
     get_extension,
     gui_mode,
     notification,
     verbose_mode,
 )
-from core.zerr import zerr
+from core.vad import remove_silence, restore_timestamps
+from core.writers import iter_transcription as iter_tx
+from core.zerr import zlog
+
+
+def get_vad_stats(
+    duration: float, speech_seconds: float, transcribe_seconds: float
+) -> dict[str, float]:
+    skipped_seconds = duration - speech_seconds
+    # decoder time scales with audio length, so the skipped audio would
+    # have cost the same per second as the speech that was transcribed
+    saved_seconds = (
+        skipped_seconds * transcribe_seconds / speech_seconds
+        if speech_seconds > 0
+        else 0.0
+    )
+    vad_stats = {
+        "vad_skipped_fraction": skipped_seconds / duration
+        if duration > 0
+        else 0.0,
+        "vad_saved_seconds": saved_seconds,
+    }
+    log(
+        f"VAD skipped {vad_stats['vad_skipped_fraction']:.0%} of the audio, "
+        f"saving about {saved_seconds:.1f}s of transcription",
+        success=True,
+    )
+    return vad_stats
 
 
 def main(args: Namespace):
@@ -44,68 +91,231 @@ def main(args: Namespace):
             gui,
             verbose,
         )
-        timestamp = file_timestamp()
 
-        audio_path = get_audio_path(file_path, timestamp)
+        file_stats = process_file(file_path, args, gui, verbose)
+        write_reports(
+            [file_stats["report"]],
+            getattr(args, "report", None),
+            getattr(args, "prometheus", None),
+            getattr(args, "trace", None),
+        )
+
+        log(
+            "Transcription complete! Output file: "
+            f"[{', '.join(file_stats['outputs'])}]",
+            success=True,
+        )
+        notification(msg="Transcription complete!", gui=gui, verbose=verbose)
+
+        return None
+    except Exception as e:
+        zlog(e)
+        return None
+
+
+def process_file(
+    file_path: str,
+    args: Namespace,
+    gui: bool = False,
+    verbose: bool = False,
+    model: Optional[Any] = None,
+) -> dict[str, Any]:
+    start_time = time.perf_counter()
+    start_job_report(file_path)
+
+    # intermediates live in a directory of this job only, removed even
+    # when it fails, so concurrent runs never touch each other's files
+    with job_scratch(file_path):
+        chunk_seconds = getattr(args, "chunk", 0) or 0
+        vad = bool(getattr(args, "vad", False))
+        with span("probe"):
+            tracks = get_tracks(
+                probe_media(file_path),
+                getattr(args, "tracks", None),
+                getattr(args, "stream", 0) or 0,
+                args.language,
+            )
+
+        for track in tracks:
+            track["cache_key"] = get_cache_key(
+                file_path,
+                args.model,
+                track["language"],
+                get_cache_options(track["stream"], chunk_seconds, vad),
+            )
+            with span("cache_lookup", stream=track["stream"]):
+                track["result"] = cache_lookup(track["cache_key"])
+
+        pending = [track for track in tracks if track["result"] is None]
+        vad_stats = {}
+        if pending:
+            with span("decode", input_bytes=os.path.getsize(file_path)):
+                if len(pending) == 1:
+                    audios = [get_audio_path(file_path, pending[0]["stream"])]
+                else:
+                    audios = decode_audio_streams(
+                        file_path, [track["stream"] for track in pending]
+                    )
+            vad_stats = transcribe_tracks(pending, audios, args, model)
 
-        confirm_audio_path = file_check(audio_path)
-        if not confirm_audio_path[0]:
-            raise Exception(confirm_audio_path[1])
+        transcription_types = get_tx_types(args.type, gui)
 
-        last_cache = check_for_last_cache(gui)
-        cache_file = (
-            get_cache_path(timestamp) if last_cache is None else last_cache
+        output_file_paths = []
+        for track in tracks:
+            output_file_paths += write_outputs(
+                track, file_path, transcription_types, args, gui, verbose
+            )
+
+    report = finish_job_report()
+    if report is not None:
+        log(
+            f"Stage timings [{file_path}]: "
+            + ", ".join(
+                f"{stage['stage']}={stage['seconds']:.2f}s"
+                for stage in report["spans"]
+            ),
+            success=True,
         )
 
-        if last_cache == cache_file:
-            result = cache_loader(cache_file)
-        else:
-            result = transcribe_audio(audio_path, args.model, args.language)
-            cache_saver(cache_file, result)
+    return {
+        "file": file_path,
+        "outputs": output_file_paths,
+        "seconds": time.perf_counter() - start_time,
+        "audio_seconds": sum(
+            get_audio_duration(track["result"]) for track in tracks
+        ),
+        # memoised by get_cache_key, so the batch index gets it for free
+        "content_hash": get_content_hash(file_path),
+        "report": report,
+        **vad_stats,
+    }
+
+
+def transcribe_tracks(
+    tracks: list[dict[str, Any]],
+    audios: list[Any],
+    args: Namespace,
+    model: Optional[Any] = None,
+) -> dict[str, float]:
+    chunk_seconds = getattr(args, "chunk", 0) or 0
+    vad = bool(getattr(args, "vad", False))
+    durations = [len(audio) / SAMPLE_RATE for audio in audios]
+
+    time_maps = []
+    if vad:
+        with span("vad"):
+            for index, audio in enumerate(audios):
+                audios[index], time_map = remove_silence(audio)
+                time_maps.append(time_map)
+    speech_seconds = sum(len(audio) / SAMPLE_RATE for audio in audios)
+    transcribe_start = time.perf_counter()
 
+    with span("transcription", audio_seconds=speech_seconds):
+        results: list[Optional[dict[str, Any]]] = [None] * len(tracks)
+        for index, (track, audio) in enumerate(zip(tracks, audios)):
+            if len(audio) == 0:
+                results[index] = {
+                    "text": "",
+                    "segments": [],
+                    "language": track["language"],
+                }
+            elif chunk_seconds > 0:
+                results[index] = transcribe_chunked(
+                    audio,
+                    args.model,
+                    track["language"],
+                    chunk_seconds,
+                    args.chunk_workers,
+                    checkpoint_key=track["cache_key"],
+                    model=model,
+                )
+        remaining = [
+            index for index, result in enumerate(results) if result is None
+        ]
+        if len(remaining) == 1:
+            index = remaining[0]
+            results[index] = transcribe_audio(
+                audios[index],
+                args.model,
+                tracks[index]["language"],
+                model=model,
+            )
+        elif remaining:
+            # tracks are independent, so they run side by side like chunks
+            for index, result in zip(
+                remaining,
+                transcribe_audio_tracks(
+                    [audios[index] for index in remaining],
+                    args.model,
+                    [tracks[index]["language"] for index in remaining],
+                    args.chunk_workers,
+                    model=model,
+                ),
+            ):
+                results[index] = result
+
+    vad_stats = {}
+    if vad:
+        vad_stats = get_vad_stats(
+            sum(durations),
+            speech_seconds,
+            time.perf_counter() - transcribe_start,
+        )
+    for index, track in enumerate(tracks):
+        result = results[index]
         if result is None:
             raise Exception(
                 "Something went wrong while transcribing the audio "
                 "as the transcription output is None."
             )
+        if vad:
+            result = restore_timestamps(result, time_maps[index])
+        result["duration"] = durations[index]
+        track["result"] = result
 
-        transcription_type = get_tx_type(args.type, gui)
-        language = get_lang(args.language)
+        with span("cache_store", stream=track["stream"]):
+            cache_store(track["cache_key"], result)
+            clear_checkpoints(track["cache_key"])
+    return vad_stats
 
-        output_file_path = get_output_path(
-            file_path, transcription_type, args.outputfolder
-        )
 
-        ext = get_extension(transcription_type)
+def write_outputs(
+    track: dict[str, Any],
+    file_path: str,
+    transcription_types: list[int],
+    args: Namespace,
+    gui: bool = False,
+    verbose: bool = False,
+) -> list[str]:
+    language = get_lang(track["language"])
+    output_file_paths = get_output_paths(
+        file_path,
+        transcription_types,
+        args.outputfolder,
+        f".{track['label']}" if track["label"] else "",
+    )
 
-        processed_content = process_tx(result, transcription_type, language)
+    # every requested format is rendered from the same result in one pass
+    for transcription_type, output_file_path in output_file_paths.items():
+        ext = get_extension(transcription_type)
 
-        write_result = write_output(
-            processed_content, output_file_path, ext, gui, verbose
+        processed_content = iter_tx(
+            track["result"], transcription_type, language
         )
 
+        with span("write", type=transcription_type):
+            write_result = write_output(
+                processed_content, output_file_path, ext, gui, verbose
+            )
+
         if not write_result[0]:
             raise Exception(write_result[1])
 
-        if file_check(output_file_path)[0]:
-            scratch_cleanup()
-            log(
-                f"Transcription complete! Output file: [{output_file_path}]",
-                success=True,
-            )
-            notification(
-                msg="Transcription complete!", gui=gui, verbose=verbose
-            )
-        else:
+        if not file_check(output_file_path)[0]:
             notification(
                 "error", "Transcription failed!", gui=gui, verbose=verbose
             )
             raise Exception(
                 f"Transcription failed! Output file: [{output_file_path}]"
             )
-
-        return None
-    except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        return None
+    return list(output_file_paths.values())
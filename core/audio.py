@@ -1,61 +1,155 @@
 import os
+import subprocess
+import tempfile
 
 
-from pydub import AudioSegment
+from typing import TYPE_CHECKING
 
 
 from core.filer import file_check
 from core.logger import log
 from core.utils import (
-    get_file_type_dict as file_types_dict,
-    scratch_path as get_temp_dir,
+    get_ffmpeg_audio_args,
+    get_ffmpeg_stream_args,
 )
-from core.video import extract_audio_from_video as extract_audio, prep_video
-from core.zerr import zerr
-
-
-def get_audio_path(filepath: str, timestamp: str) -> str:
-    types_dict = file_types_dict()
-    if filepath.endswith(tuple(types_dict["ffmpeg_v"])):
-        verified_video_file = prep_video(filepath, timestamp)
-        audio_path = extract_audio(verified_video_file, timestamp)
-    elif filepath.endswith(tuple(types_dict["ffmpeg_a"])):
-        audio_path = prep_audio(filepath, timestamp)
-    elif filepath is None or filepath == "":
-        raise Exception("No file selected.")
-    else:
-        raise Exception(f"[{filepath}] is an unsupported file type.")
-    if audio_path is None or audio_path == "":
-        raise Exception("No audio file selected.")
-    return audio_path
+from core.probe import get_audio_stream, get_media_duration, probe_media
+from core.scratch import ensure_scratch_space
+from core.zerr import zraise
+
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+READ_BLOCK_SIZE = 1024**2
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
 
 
-def prep_audio(filepath: str, timestamp: str):
-    types_dict = file_types_dict()
-    temp_dir = get_temp_dir()
+def decode_audio(filepath: str, stream: int = 0) -> "np.ndarray":
     try:
-        if not filepath.endswith(tuple(types_dict["whisper"])):
-            raise Exception(
-                f"[{filepath}] is not a supported audio file type."
-            )
-        else:
-            audio = AudioSegment.from_file(filepath)
-            converted_audio_path = os.path.join(
-                temp_dir, f"{timestamp}_audio_converted.wav"
+        import numpy as np
+
+        # decode straight to the 16 kHz mono float32 buffer whisper expects,
+        # so nothing is written to scratch and ffmpeg only runs once. The
+        # buffer is sized from the probed duration and filled block by
+        # block, so the peak is the output plus one block, not the raw PCM
+        # plus a converted copy
+        audio = np.empty(
+            int((get_media_duration(filepath) + 1) * SAMPLE_RATE),
+            np.float32,
+        )
+        samples = 0
+        block = bytearray(READ_BLOCK_SIZE)
+        view = memoryview(block)
+        command = get_ffmpeg_audio_args(filepath, stream, SAMPLE_RATE) + [
+            "-f",
+            "s16le",
+            "-",
+        ]
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=stderr_file
             )
-            audio.export(converted_audio_path, format="wav")
-            audio.close()
-            file_check_result = file_check(converted_audio_path)
-            if not file_check_result[0]:
-                raise Exception(file_check_result[1])
-            else:
-                log(
-                    f"Audio [{filepath}] successfully converted "
-                    f"to Audio [{converted_audio_path}] for audio prep",
-                    success=True,
+            stdout = process.stdout
+            if stdout is None:
+                raise Exception("ffmpeg did not open an output pipe")
+            carry = 0
+            while True:
+                read = stdout.readinto(view[carry:])
+                if not read:
+                    break
+                filled = carry + read
+                count = filled // 2
+                if samples + count > len(audio):
+                    # the probe underestimated the duration
+                    audio.resize(
+                        max(samples + count, int(len(audio) * 1.5)),
+                        refcheck=False,
+                    )
+                audio[samples : samples + count] = np.frombuffer(
+                    block, np.int16, count
                 )
-                return converted_audio_path
+                samples += count
+                # an odd byte count leaves half a sample for the next read
+                carry = filled % 2
+                if carry:
+                    block[0] = block[filled - 1]
+            stdout.close()
+            if process.wait() != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", "replace").strip()
+                if "matches no streams" in stderr:
+                    raise Exception(f"[{filepath}] does not contain audio")
+                raise Exception(
+                    f"ffmpeg failed to decode audio from [{filepath}]: "
+                    f"{stderr}"
+                )
+        audio.resize(samples, refcheck=False)
+        audio /= 32768.0
+        log(
+            f"Audio [{filepath}] decoded "
+            f"({len(audio) / SAMPLE_RATE:.1f}s)",
+            success=True,
+        )
+        return audio
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
+
+
+def decode_audio_streams(
+    filepath: str, streams: list[int]
+) -> list["np.ndarray"]:
+    try:
+        import numpy as np
+
+        # one demux pass writes every selected stream to its own scratch
+        # file, instead of reopening the container once per track
+        temp_dir = ensure_scratch_space(
+            probe_media(filepath)["duration"], len(streams)
+        )
+        pcm_paths = [
+            os.path.join(temp_dir, f"stream{stream}.pcm") for stream in streams
+        ]
+        command = get_ffmpeg_audio_args(filepath, streams[0], SAMPLE_RATE)
+        for index, (stream, pcm_path) in enumerate(zip(streams, pcm_paths)):
+            if index > 0:
+                command += get_ffmpeg_stream_args(stream, SAMPLE_RATE)
+            command += ["-f", "s16le", "-y", pcm_path]
+        try:
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                raise Exception(
+                    f"ffmpeg failed to decode audio from [{filepath}]: "
+                    f"{completed.stderr.strip()}"
+                )
+            audios = []
+            for pcm_path in pcm_paths:
+                audio = np.fromfile(pcm_path, np.int16).astype(np.float32)
+                audio /= 32768.0
+                audios.append(audio)
+        finally:
+            for pcm_path in pcm_paths:
+                if os.path.exists(pcm_path):
+                    os.remove(pcm_path)
+        log(
+            f"Audio streams {streams} of [{filepath}] decoded in one pass",
+            success=True,
+        )
+        return audios
+    except Exception as e:
+        raise zraise(e)
+
+
+def get_audio_path(filepath: str, stream: int = 0) -> "np.ndarray":
+    if filepath is None or filepath == "":
+        raise Exception("No file selected.")
+    file_check_result = file_check(filepath)
+    if not file_check_result[0]:
+        raise Exception(file_check_result[1])
+    # the probe reads only the container header, so unreadable files and
+    # files without the requested audio stream fail before any decoding
+    get_audio_stream(probe_media(filepath), stream)
+    audio = decode_audio(filepath, stream)
+    if audio is None or audio.size == 0:
+        raise Exception(f"No audio decoded from [{filepath}].")
+    return audio
@@ -0,0 +1,244 @@
+import glob
+import os
+import time
+
+
+from argparse import Namespace
+from functools import partial
+from typing import Any, Callable, Optional
+
+
+from core.app import process_file
+from core.crawler import crawl
+from core.filer import file_check
+from core.filetypes import classify
+from core.index import (
+    filter_changed,
+    get_index_options,
+    open_index,
+    record_file,
+)
+from core.logger import log
+from core.metrics import write_reports
+from core.scheduler import format_progress, get_durations, schedule_files
+from core.transcribe import get_model, get_model_stats
+from core.utils import (
+    notification,
+    verbose_mode,
+)
+from core.zerr import zlog, zraise
+
+
+def batch_main(args: Namespace) -> dict[str, Any]:
+    try:
+        verbose = verbose_mode(args.verbose)
+        entries, seen = get_batch_entries(
+            args.batch, getattr(args, "crawl_workers", None)
+        )
+        if len(entries) == 0:
+            raise Exception(f"No video/audio files found in [{args.batch}]")
+
+        index = open_index()
+        options = get_index_options(args)
+        if getattr(args, "incremental", False):
+            entries = filter_changed(
+                index, entries, args.model, args.language, options, seen
+            )
+            if len(entries) == 0:
+                index.close()
+                print("Every file is already transcribed")
+                return get_batch_summary([], [], 0.0, 0.0)
+        file_paths = [entry[0] for entry in entries]
+        # finished files are recorded as they complete, so an interrupted
+        # run does not redo them on the next incremental scan
+        on_complete = partial(
+            record_file,
+            index,
+            modelname=args.model,
+            lang=args.language,
+            options=options,
+        )
+
+        workers = getattr(args, "workers", 1) or 1
+        if workers > 1:
+            scheduled = schedule_files(
+                file_paths,
+                args,
+                workers,
+                getattr(args, "threads", None),
+                on_complete,
+            )
+            completed = scheduled["completed"]
+            failed = scheduled["failed"]
+            model_seconds = scheduled["model_seconds"]
+            seconds = scheduled["seconds"]
+            utilisation = scheduled["utilisation"]
+        else:
+            completed, failed, model_seconds, seconds = run_sequential(
+                file_paths, args, verbose, on_complete
+            )
+            utilisation = {}
+            log(f"Model cache: {get_model_stats()}", success=True)
+
+        index.close()
+
+        summary = get_batch_summary(
+            completed, failed, model_seconds, seconds, utilisation
+        )
+        print(format_batch_summary(summary))
+        write_reports(
+            [stats["report"] for stats in completed if stats.get("report")],
+            getattr(args, "report", None),
+            getattr(args, "prometheus", None),
+            getattr(args, "trace", None),
+        )
+        log(
+            f"Batch complete! {summary['completed']} transcribed, "
+            f"{summary['failed']} failed",
+            success=True,
+        )
+        notification(msg="Batch transcription complete!", verbose=verbose)
+        return summary
+    except Exception as e:
+        zlog(e)
+        return {}
+
+
+def format_batch_summary(summary: dict[str, Any]) -> str:
+    utilisation = "".join(
+        f"\nWorker {pid}: {busy:.0%} busy"
+        for pid, busy in summary["utilisation"].items()
+    )
+    failed_files = "".join(
+        f"\nFailed: {file_path}" for file_path in summary["failed_files"]
+    )
+    return (
+        f"Files: {summary['completed']} transcribed, "
+        f"{summary['failed']} failed\n"
+        f"Model load: {summary['model_seconds']:.1f}s\n"
+        f"Wall time: {summary['seconds']:.1f}s for "
+        f"{summary['audio_seconds']:.1f}s of audio "
+        f"({summary['realtime_speed']:.2f}x real time, "
+        f"{summary['files_per_hour']:.1f} files/hour)"
+        f"{utilisation}{failed_files}"
+    )
+
+
+def format_throughput(file_stats: dict[str, Any]) -> str:
+    speed = (
+        file_stats["audio_seconds"] / file_stats["seconds"]
+        if file_stats["seconds"] > 0
+        else 0.0
+    )
+    vad = (
+        f", VAD skipped {file_stats['vad_skipped_fraction']:.0%}"
+        if "vad_skipped_fraction" in file_stats
+        else ""
+    )
+    return (
+        f"{file_stats['file']}: {file_stats['seconds']:.1f}s for "
+        f"{file_stats['audio_seconds']:.1f}s of audio "
+        f"({speed:.2f}x real time{vad})"
+    )
+
+
+def get_batch_entries(
+    source: str, workers: Optional[int] = None
+) -> tuple[list[tuple[str, int, int]], Optional[set[str]]]:
+    try:
+        if os.path.isdir(source):
+            return crawl(source, workers)
+        elif os.path.isfile(source) and classify(source) is None:
+            with open(source, "r") as f:
+                candidates = [
+                    line.strip()
+                    for line in f
+                    if line.strip() and not line.strip().startswith("#")
+                ]
+        else:
+            candidates = sorted(glob.glob(source, recursive=True))
+
+        entries = []
+        seen = set()
+        for candidate in candidates:
+            if classify(candidate) is None:
+                continue
+            if not file_check(candidate)[0]:
+                continue
+            file_path = os.path.abspath(candidate)
+            if file_path not in seen:
+                seen.add(file_path)
+                file_stat = os.stat(file_path)
+                entries.append(
+                    (file_path, file_stat.st_size, file_stat.st_mtime_ns)
+                )
+        return entries, None
+    except Exception as e:
+        raise zraise(e)
+
+
+def get_batch_summary(
+    completed: list[dict[str, Any]],
+    failed: list[str],
+    model_seconds: float,
+    seconds: float,
+    utilisation: Optional[dict[int, float]] = None,
+) -> dict[str, Any]:
+    audio_seconds = sum(stats["audio_seconds"] for stats in completed)
+    return {
+        "completed": len(completed),
+        "failed": len(failed),
+        "failed_files": failed,
+        "model_seconds": model_seconds,
+        "seconds": seconds,
+        "audio_seconds": audio_seconds,
+        "realtime_speed": audio_seconds / seconds if seconds > 0 else 0.0,
+        "files_per_hour": len(completed) * 3600 / seconds
+        if seconds > 0
+        else 0.0,
+        "files": completed,
+        "utilisation": utilisation or {},
+    }
+
+
+def run_sequential(
+    file_paths: list[str],
+    args: Namespace,
+    verbose: bool = False,
+    on_complete: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> tuple[list[dict[str, Any]], list[str], float, float]:
+    run_start = time.perf_counter()
+    model = get_model(args.model)
+    model_seconds = time.perf_counter() - run_start
+
+    durations = get_durations(file_paths)
+    total_seconds = sum(durations.values())
+    done_seconds = 0.0
+    completed = []
+    failed = []
+    for index, file_path in enumerate(file_paths, start=1):
+        try:
+            file_stats = process_file(
+                file_path,
+                args,
+                verbose=verbose,
+                model=model,
+            )
+            completed.append(file_stats)
+            if on_complete is not None:
+                on_complete(file_stats)
+            status = format_throughput(file_stats)
+        except Exception as e:
+            zlog(e)
+            failed.append(file_path)
+            status = f"FAILED: {file_path}"
+        done_seconds += durations[file_path]
+        progress = format_progress(
+            index,
+            len(file_paths),
+            done_seconds,
+            total_seconds,
+            time.perf_counter() - run_start,
+        )
+        print(f"{progress} {status}")
+    return completed, failed, model_seconds, time.perf_counter() - run_start
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import threading
+
+
+from typing import Any, Optional
+
+
+from core.logger import log
+from core.results import load_result, save_result
+from core.zerr import zlog, zraise
+
+
+CACHE_EXTENSION = ".tgr"
+EVICT_LOW_WATER = 0.9
+PROBE_DIR = "probe"
+PROBE_EXTENSION = ".json"
+
+_cache_bytes: Optional[int] = None
+_cache_bytes_lock = threading.Lock()
+_content_hashes: dict[tuple[str, int, int], str] = {}
+
+
+def add_cache_bytes(added_bytes: int) -> None:
+    global _cache_bytes
+    try:
+        # the cache is walked once per process to seed the total, and again
+        # only when it goes over the limit, not on every write
+        with _cache_bytes_lock:
+            if _cache_bytes is None:
+                # the walk already sees the entry just written
+                _cache_bytes = sum(entry[1] for entry in scan_cache())
+            else:
+                _cache_bytes += added_bytes
+            over_limit = _cache_bytes > get_cache_limit()
+        if over_limit:
+            # evicting below the limit leaves room for many more writes
+            # before the next walk
+            evict_cache(int(get_cache_limit() * EVICT_LOW_WATER))
+    except Exception as e:
+        zlog(e)
+
+
+def cache_lookup(key: str) -> Optional[Any]:
+    try:
+        cache_file = get_cache_file(key)
+        if not os.path.isfile(cache_file):
+            return None
+        os.utime(cache_file)  # mark as most recently used for eviction
+        result = load_result(cache_file)
+        log(f"Cache hit [{key}]", success=True)
+        return result
+    except Exception as e:
+        zlog(e)
+        return None
+
+
+def cache_path() -> str:
+    try:
+        cache_dir = os.environ.get("CACHE_DIR", "./.cache")
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        if not os.path.isdir(cache_dir):
+            raise Exception(f"{cache_dir} exists but is not a directory")
+        if not os.access(cache_dir, os.W_OK):
+            raise Exception(f"{cache_dir} is not writable")
+        return cache_dir
+    except Exception as e:
+        raise zraise(e)
+
+
+def cache_store(key: str, result: Any) -> None:
+    try:
+        cache_file = get_cache_file(key)
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        partial_file = f"{cache_file}.{os.getpid()}.partial"
+        save_result(partial_file, result)
+        replaced_bytes = (
+            os.path.getsize(cache_file) if os.path.isfile(cache_file) else 0
+        )
+        os.replace(partial_file, cache_file)
+        add_cache_bytes(os.path.getsize(cache_file) - replaced_bytes)
+    except Exception as e:
+        zlog(e)
+
+
+def evict_cache(max_bytes: Optional[int] = None) -> int:
+    global _cache_bytes
+    try:
+        if max_bytes is None:
+            max_bytes = get_cache_limit()
+        entries = scan_cache()
+        total_bytes = sum(entry[1] for entry in entries)
+
+        evicted = 0
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass  # evicted by another process meanwhile
+            total_bytes -= size
+            evicted += 1
+        # the walk also picks up what other processes wrote meanwhile
+        with _cache_bytes_lock:
+            _cache_bytes = total_bytes
+        if evicted > 0:
+            log(f"Evicted {evicted} cache entries", success=True)
+        return evicted
+    except Exception as e:
+        zlog(e)
+        return 0
+
+
+def get_cache_file(key: str) -> str:
+    return os.path.join(cache_path(), key[:2], f"{key}{CACHE_EXTENSION}")
+
+
+def get_cache_options(
+    stream: int = 0, chunk_seconds: float = 0, vad: bool = False
+) -> dict[str, Any]:
+    from core.transcribe import get_model_dtype
+
+    # the CLI, batch workers and the server all key results through here,
+    # so the same file and settings hit the same entry whichever ran it.
+    # The resolved dtype counts, since int8 or fp16 results differ from fp32
+    options: dict[str, Any] = {
+        "chunk": chunk_seconds,
+        "dtype": get_model_dtype(),
+        "vad": vad,
+    }
+    if stream:
+        options["stream"] = stream
+    return options
+
+
+def get_cache_key(
+    filepath: str,
+    modelname: str,
+    lang: str,
+    options: Optional[dict[str, Any]] = None,
+) -> str:
+    try:
+        parameters = json.dumps(
+            {"model": modelname, "language": lang, "options": options or {}},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(
+            f"{get_content_hash(filepath)}:{parameters}".encode("utf-8")
+        ).hexdigest()
+    except Exception as e:
+        raise zraise(e)
+
+
+def get_cache_limit() -> int:
+    try:
+        return int(float(os.environ.get("CACHE_MAX_MB", "2048")) * 1024**2)
+    except ValueError:
+        return 2048 * 1024**2
+
+
+def get_content_hash(filepath: str, block_size: int = 1024**2) -> str:
+    # every track of a multi-track file needs its own key, but the file is
+    # only read once as long as it has not changed on disk
+    file_stat = os.stat(filepath)
+    file_key = (
+        os.path.abspath(filepath),
+        file_stat.st_mtime_ns,
+        file_stat.st_size,
+    )
+    content_hash = _content_hashes.get(file_key)
+    if content_hash is not None:
+        return content_hash
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    content_hash = hasher.hexdigest()
+    _content_hashes[file_key] = content_hash
+    return content_hash
+
+
+def scan_cache() -> list[tuple[float, int, str]]:
+    entries = []
+    cache_dir = cache_path()
+    for root, _, names in os.walk(cache_dir):
+        # in-progress checkpoints use their own extension and are removed
+        # once the file's result is cached; probe results share the size
+        # limit, or they would pile up forever
+        extension = (
+            PROBE_EXTENSION
+            if os.path.relpath(root, cache_dir).split(os.sep)[0] == PROBE_DIR
+            else CACHE_EXTENSION
+        )
+        for name in names:
+            if not name.endswith(extension):
+                continue
+            entry_path = os.path.join(root, name)
+            try:
+                entry_stat = os.stat(entry_path)
+            except OSError:
+                continue  # removed by another process meanwhile
+            entries.append(
+                (entry_stat.st_mtime, entry_stat.st_size, entry_path)
+            )
+    return entries
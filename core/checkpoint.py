@@ -0,0 +1,79 @@
+import os
+import shutil
+
+
+from typing import Any, Optional
+
+
+from core.cache import cache_path
+from core.logger import log
+from core.results import load_result, save_result
+from core.zerr import zlog, zraise
+
+
+CHECKPOINT_EXTENSION = ".ckpt"
+
+
+def checkpoint_path(key: str) -> str:
+    return os.path.join(cache_path(), "checkpoints", key)
+
+
+def clear_checkpoints(key: Optional[str]) -> None:
+    try:
+        if key is None:
+            return
+        checkpoint_dir = checkpoint_path(key)
+        if os.path.isdir(checkpoint_dir):
+            shutil.rmtree(checkpoint_dir)
+    except Exception as e:
+        zlog(e)
+
+
+def get_checkpoint_file(key: str, index: int, window: tuple[int, int]) -> str:
+    # the window bounds are part of the name, so checkpoints written with
+    # different chunk settings are never mistaken for this run's windows
+    return os.path.join(
+        checkpoint_path(key),
+        f"{index:05d}_{window[0]}_{window[1]}{CHECKPOINT_EXTENSION}",
+    )
+
+
+def load_checkpoints(
+    key: Optional[str], windows: list[tuple[int, int]]
+) -> dict[int, dict[str, Any]]:
+    checkpoints: dict[int, dict[str, Any]] = {}
+    if key is None:
+        return checkpoints
+    for index, window in enumerate(windows):
+        checkpoint_file = get_checkpoint_file(key, index, window)
+        if not os.path.isfile(checkpoint_file):
+            continue
+        try:
+            checkpoints[index] = load_result(checkpoint_file)
+        except Exception as e:
+            zlog(e)
+    if len(checkpoints) > 0:
+        log(
+            f"Resuming from {len(checkpoints)} of {len(windows)} "
+            f"checkpointed windows [{key}]",
+            success=True,
+        )
+    return checkpoints
+
+
+def save_checkpoint(
+    key: Optional[str],
+    index: int,
+    window: tuple[int, int],
+    result: dict[str, Any],
+) -> None:
+    try:
+        if key is None:
+            return
+        checkpoint_file = get_checkpoint_file(key, index, window)
+        os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+        partial_file = f"{checkpoint_file}.{os.getpid()}.partial"
+        save_result(partial_file, result)
+        os.replace(partial_file, checkpoint_file)
+    except Exception as e:
+        raise zraise(e)
@@ -0,0 +1,251 @@
+import multiprocessing
+
+
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from typing import Any, Optional, TYPE_CHECKING
+
+
+from core.audio import SAMPLE_RATE
+from core.checkpoint import load_checkpoints, save_checkpoint
+from core.logger import log
+from core.scheduler import get_threads_per_worker
+from core.zerr import zraise
+
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+FRAME_SECONDS = 0.02
+MIN_CHUNK_SECONDS = 2.0
+
+_worker_model: Optional[Any] = None
+
+
+def find_split_points(
+    audio: "np.ndarray", chunk_seconds: float, search_seconds: float = 5.0
+) -> list[int]:
+    import numpy as np
+
+    if chunk_seconds < MIN_CHUNK_SECONDS:
+        raise Exception(
+            f"Chunks must be at least {MIN_CHUNK_SECONDS:g}s long, "
+            f"got {chunk_seconds:g}s"
+        )
+    frame_size = int(SAMPLE_RATE * FRAME_SECONDS)
+    frame_count = len(audio) // frame_size
+    chunk_frames = int(chunk_seconds / FRAME_SECONDS)
+    if frame_count <= chunk_frames:
+        return [0, len(audio)]
+
+    frames = audio[: frame_count * frame_size].reshape(frame_count, frame_size)
+    energy = np.sqrt(np.mean(np.square(frames), axis=1))
+    # at most half a chunk either side, so the next target always lies
+    # beyond the split just chosen
+    search_frames = min(
+        int(search_seconds / FRAME_SECONDS), chunk_frames // 2
+    )
+
+    # cut at the quietest frame near each chunk boundary so words are not
+    # split between workers
+    split_points = [0]
+    target = chunk_frames
+    while target < frame_count - search_frames:
+        window_start = max(
+            target - search_frames, split_points[-1] // frame_size + 1
+        )
+        window_end = min(target + search_frames, frame_count)
+        quietest = window_start + int(
+            np.argmin(energy[window_start:window_end])
+        )
+        split_points.append(quietest * frame_size)
+        target = quietest + chunk_frames
+    split_points.append(len(audio))
+    return split_points
+
+
+def init_chunk_worker(modelname: str, threads: int) -> None:
+    global _worker_model
+    import torch
+
+    from core.transcribe import get_model
+
+    torch.set_num_threads(threads)
+    _worker_model = get_model(modelname)
+
+
+def merge_chunk_results(
+    chunk_results: list[dict[str, Any]],
+    split_points: list[int],
+    duration: float,
+) -> dict[str, Any]:
+    segments = []
+    for index, chunk_result in enumerate(chunk_results):
+        # overlapping segments belong to the chunk that holds their midpoint
+        owned_start = split_points[index] / SAMPLE_RATE
+        owned_end = split_points[index + 1] / SAMPLE_RATE
+        for segment in chunk_result["segments"]:
+            midpoint = (segment["start"] + segment["end"]) / 2
+            if owned_start <= midpoint < owned_end:
+                segment["id"] = len(segments)
+                segments.append(segment)
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": chunk_results[0].get("language")
+        if chunk_results
+        else None,
+        "duration": duration,
+    }
+
+
+def offset_segments(result: dict[str, Any], offset: float) -> dict[str, Any]:
+    for segment in result["segments"]:
+        segment["start"] += offset
+        segment["end"] += offset
+        for word in segment.get("words", []):
+            word["start"] += offset
+            word["end"] += offset
+    return result
+
+
+def transcribe_chunk(
+    audio: "np.ndarray",
+    modelname: str,
+    lang: str,
+    offset: float,
+    model: Optional[Any] = None,
+):
+    from core.transcribe import transcribe_audio
+
+    result = transcribe_audio(
+        audio, modelname, lang, model=model or _worker_model
+    )
+    return offset_segments(result, offset)
+
+
+def transcribe_chunked(
+    audio: "np.ndarray",
+    modelname: str,
+    lang: str,
+    chunk_seconds: float,
+    workers: int = 2,
+    overlap_seconds: float = 1.0,
+    checkpoint_key: Optional[str] = None,
+    model: Optional[Any] = None,
+) -> dict[str, Any]:
+    try:
+        split_points = find_split_points(audio, chunk_seconds)
+        overlap = int(overlap_seconds * SAMPLE_RATE)
+        windows = [
+            (max(start - overlap, 0), min(end + overlap, len(audio)))
+            for start, end in zip(split_points, split_points[1:])
+        ]
+        chunk_results = load_checkpoints(checkpoint_key, windows)
+        pending = [
+            index
+            for index in range(len(windows))
+            if index not in chunk_results
+        ]
+
+        # a caller holding a model (batch runs) keeps using it: worker
+        # processes would each load another copy for every file
+        if workers <= 1 or model is not None:
+            log(
+                f"Transcribing {len(pending)} of {len(windows)} chunks "
+                "in process",
+                success=True,
+            )
+            for index in pending:
+                start, end = windows[index]
+                chunk_results[index] = transcribe_chunk(
+                    audio[start:end],
+                    modelname,
+                    lang,
+                    start / SAMPLE_RATE,
+                    model=model,
+                )
+                save_checkpoint(
+                    checkpoint_key, index, windows[index], chunk_results[index]
+                )
+        elif len(pending) > 0:
+            threads = get_threads_per_worker(workers)
+            log(
+                f"Transcribing {len(pending)} of {len(windows)} chunks with "
+                f"{workers} workers x {threads} threads",
+                success=True,
+            )
+            # spawn, because forking a process that already initialised
+            # torch can deadlock its thread pools
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_chunk_worker,
+                initargs=(modelname, threads),
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        transcribe_chunk,
+                        audio[windows[index][0] : windows[index][1]],
+                        modelname,
+                        lang,
+                        windows[index][0] / SAMPLE_RATE,
+                    ): index
+                    for index in pending
+                }
+                # each window is committed as soon as it finishes, so a
+                # killed run resumes from everything already done
+                for future in as_completed(futures):
+                    index = futures[future]
+                    chunk_results[index] = future.result()
+                    save_checkpoint(
+                        checkpoint_key,
+                        index,
+                        windows[index],
+                        chunk_results[index],
+                    )
+
+        return merge_chunk_results(
+            [chunk_results[index] for index in range(len(windows))],
+            split_points,
+            len(audio) / SAMPLE_RATE,
+        )
+    except Exception as e:
+        raise zraise(e)
+
+
+def transcribe_tracks(
+    audios: list["np.ndarray"],
+    modelname: str,
+    languages: list[str],
+    workers: int = 2,
+    model: Optional[Any] = None,
+) -> list[dict[str, Any]]:
+    try:
+        workers = min(workers, len(audios))
+        if workers <= 1 or model is not None:
+            return [
+                transcribe_chunk(audio, modelname, lang, 0.0, model=model)
+                for audio, lang in zip(audios, languages)
+            ]
+
+        threads = get_threads_per_worker(workers)
+        log(
+            f"Transcribing {len(audios)} audio tracks with "
+            f"{workers} workers x {threads} threads",
+            success=True,
+        )
+        # the same worker setup as chunks: each track is one whole window
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_chunk_worker,
+            initargs=(modelname, threads),
+        ) as pool:
+            futures = [
+                pool.submit(transcribe_chunk, audio, modelname, lang, 0.0)
+                for audio, lang in zip(audios, languages)
+            ]
+            return [future.result() for future in futures]
+    except Exception as e:
+        raise zraise(e)
@@ -0,0 +1,78 @@
+import os
+
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Optional
+
+
+from core.filetypes import classify
+from core.logger import log
+from core.zerr import zlog, zraise
+
+
+CRAWL_WORKERS = 16
+
+
+def crawl(
+    root: str, workers: Optional[int] = None
+) -> tuple[list[tuple[str, int, int]], set[str]]:
+    try:
+        media = []
+        seen = set()
+        # directories are listed concurrently: on a network mount each
+        # listing is a round trip, so threads hide the latency
+        with ThreadPoolExecutor(max_workers=workers or CRAWL_WORKERS) as pool:
+            pending = {pool.submit(scan_directory, os.path.abspath(root))}
+            directories = 0
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entries, file_paths, subdirectories = future.result()
+                    directories += 1
+                    media += entries
+                    seen.update(file_paths)
+                    pending.update(
+                        pool.submit(scan_directory, subdirectory)
+                        for subdirectory in subdirectories
+                    )
+        media.sort()
+        log(
+            f"Crawled [{root}]: {directories} directories, "
+            f"{len(seen)} files, {len(media)} media files",
+            success=True,
+        )
+        return media, seen
+    except Exception as e:
+        raise zraise(e)
+
+
+def scan_directory(
+    directory: str,
+) -> tuple[list[tuple[str, int, int]], list[str], list[str]]:
+    media = []
+    file_paths = []
+    subdirectories = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # the entry type comes from the directory listing, so
+                    # only media files pay for a stat call
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.is_file():
+                        file_paths.append(entry.path)
+                        if classify(entry.name) is not None:
+                            entry_stat = entry.stat()
+                            media.append(
+                                (
+                                    entry.path,
+                                    entry_stat.st_size,
+                                    entry_stat.st_mtime_ns,
+                                )
+                            )
+                except OSError:
+                    continue
+    except OSError as e:
+        zlog(e, "WARNING")
+    return media, file_paths, subdirectories
@@ -1,45 +1,21 @@
 import glob
 import os
-import shutil
 
 
 from os import path
-from typing import Optional, Tuple
+from typing import Iterable, Optional, Tuple, Union
 
 
+from core.filetypes import get_file_types
 from core.logger import log
 from core.utils import (
     console_question as ask_q,
     file_dialog_ask as ask_box,
-    get_file_type_dict as file_types_dict,
+    get_extension,
     msgbox as msg_box,
-    scratch_path as get_temp_dir,
-    yesno_popup_ask as ask_yn,
 )
-from core.zerr import zerr
-
-
-def check_for_last_cache(gui: bool = False) -> Optional[str]:
-    try:
-        temp_dir = get_temp_dir()
-        cache_file = get_newest_file(temp_dir, "pkl")
-        if cache_file is None:
-            return None
-        else:
-            if gui:
-                response = ask_yn(f"Found cache file: {cache_file}\nUse it?")
-            else:
-                response = ask_q(
-                    f"Found cache file: {cache_file}\nUse it? (y/n): "
-                )
-            if response:
-                return cache_file
-            else:
-                return None
-    except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+from core.writers import write_stream
+from core.zerr import zlog, zraise
 
 
 def create_dir(dir_path: str) -> Tuple[bool, Optional[str]]:
@@ -49,8 +25,7 @@ def create_dir(dir_path: str) -> Tuple[bool, Optional[str]]:
         log(f"Created directory: {dir_path}", success=True)
         return True, None
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
+        error_info = zlog(e)
         return False, error_info
 
 
@@ -90,24 +65,10 @@ def filer_check(
             raise Exception(f"{type_name} is not writable: {itempath}")
         return True, None
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
+        error_info = zlog(e)
         return False, error_info
 
 
-def generate_cache_file(timestamp: str) -> str:
-    try:
-        temp_dir = get_temp_dir()
-        cache_path = os.path.join(temp_dir, f"{timestamp}_cache.pkl")
-        if os.path.exists(cache_path):
-            os.remove(cache_path)
-        return cache_path
-    except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
-
-
 def get_file_path(
     filename: str,
     file_type: str,
@@ -115,20 +76,21 @@ def get_file_path(
     verbose: bool = False,
 ) -> str:
     try:
-        types_dict = file_types_dict()
+        types_dict = get_file_types()
+        audio_types, video_types = (
+            " ".join(f"*{suffix}" for suffix in sorted(types_dict[group]))
+            for group in ("audio", "video")
+        )
         if file_type == "extractable":
             file_types = [
-                (
-                    "Audio/Videos Files",
-                    " ".join(types_dict["ffmpeg_a"] + types_dict["ffmpeg_v"]),
-                ),
-                ("Audio Files", " ".join(types_dict["ffmpeg_a"])),
-                ("Video Files", " ".join(types_dict["ffmpeg_v"])),
+                ("Audio/Videos Files", f"{audio_types} {video_types}"),
+                ("Audio Files", audio_types),
+                ("Video Files", video_types),
             ]
         elif file_type == "audio":
-            file_types = [("Audio Files", " ".join(types_dict["ffmpeg_a"]))]
+            file_types = [("Audio Files", audio_types)]
         elif file_type == "video":
-            file_types = [("Video Files", " ".join(types_dict["ffmpeg_v"]))]
+            file_types = [("Video Files", video_types)]
         else:
             file_types = [("All Files", "*.*")]
         file_path = (
@@ -149,8 +111,6 @@ def get_file_path(
             else:
                 print(error)
             raise Exception(error)
-        else:
-            file_path = file_path.lower()
 
         if not file_check(file_path)[0]:
             error = file_check(file_path)[1]
@@ -165,9 +125,7 @@ def get_file_path(
         return file_path
 
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def get_folder_path(filepath: str) -> Optional[str]:
@@ -191,9 +149,7 @@ def get_newest_file(folderpath: str, fileext: str) -> Optional[str]:
         else:
             return max(files, key=os.path.getctime)
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def get_output_folder(ogfilepath: str, outputfolderarg: Optional[str]) -> str:
@@ -211,53 +167,50 @@ def get_output_folder(ogfilepath: str, outputfolderarg: Optional[str]) -> str:
             log(error_info, "ERROR")
             raise Exception(error_info)
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def get_output_path(
-    ogfilepath: str, type: int = 0, outputfolderarg: Optional[str] = None
+    ogfilepath: str,
+    type: int = 0,
+    outputfolderarg: Optional[str] = None,
+    suffix: str = "",
 ) -> str:
     try:
         output_folder = get_output_folder(ogfilepath, outputfolderarg)
 
-        if type == 0 or type == 1:
-            output_path = os.path.join(
-                output_folder, f"{os.path.basename(ogfilepath)}.txt"
-            )
-        elif type == 2:
-            output_path = os.path.join(
-                output_folder, f"{os.path.basename(ogfilepath)}.srt"
-            )
-        else:
-            raise Exception(f"Unsupported output type: {type}")
-        return output_path
+        return os.path.join(
+            output_folder,
+            f"{os.path.basename(ogfilepath)}{suffix}{get_extension(type)}",
+        )
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
-def scratch_cleanup() -> Tuple[bool, Optional[str]]:
+def get_output_paths(
+    ogfilepath: str,
+    types: list[int],
+    outputfolderarg: Optional[str] = None,
+    suffix: str = "",
+) -> dict[int, str]:
     try:
-        temp_dir = get_temp_dir()
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            if not os.path.exists(temp_dir):
-                log("Scratch directory cleaned up", success=True)
-                return True, None
-            else:
-                raise Exception("Scratch directory cleanup failed")
-        return True, None
+        output_paths = {
+            type: get_output_path(ogfilepath, type, outputfolderarg, suffix)
+            for type in types
+        }
+        if 0 in output_paths and 1 in output_paths:
+            # both text formats share .txt, so the timed one gets a suffix
+            output_paths[1] = (
+                f"{os.path.splitext(output_paths[1])[0]}.timed"
+                f"{get_extension(1)}"
+            )
+        return output_paths
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        return False, error_info
+        raise zraise(e)
 
 
 def write_to_file_with_ask(
-    data,
+    data: Union[str, Iterable[str]],
     default_location: Optional[str] = None,
     extension: str = ".txt",
     gui: bool = False,
@@ -279,6 +232,18 @@ def write_to_file_with_ask(
                     "save",
                     default_location,
                 )
+            elif extension == ".vtt":
+                output_file_path = ask_box(
+                    [("WebVTT Files", "*.vtt")],
+                    "save",
+                    default_location,
+                )
+            elif extension == ".json":
+                output_file_path = ask_box(
+                    [("JSON Files", "*.json")],
+                    "save",
+                    default_location,
+                )
             else:
                 output_file_path = ask_box(
                     [("All Files", "*.*")],
@@ -302,9 +267,11 @@ def write_to_file_with_ask(
         if not output_file_path.endswith(extension):
             output_file_path += extension
         with open(output_file_path, "w") as f:
-            f.write(data)
+            if isinstance(data, str):
+                f.write(data)
+            else:
+                write_stream(data, f)
         return True, None
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
+        error_info = zlog(e)
         return False, error_info
@@ -0,0 +1,78 @@
+import os
+import threading
+
+
+from typing import Optional
+
+
+from core.zerr import zraise
+
+
+DEFAULT_FILE_TYPES = {
+    "audio": ".3g2,.3gp,.aac,.ac3,.flac,.m4a,.m4b,.m4r,.mka,.mp3,.mp4,.ogg,"
+    ".oga,.opus,.ra,.ram,.wav,.wma",
+    "video": ".3g2,.3gp,.asf,.avi,.dv,.f4v,.flv,.m2ts,.m4v,.mkv,.mov,.mp4,"
+    ".mpeg,.mpg,.mts,.mxf,.ogv,.rm,.rmvb,.ts,.vob,.webm,.wmv",
+}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_file_types: Optional[dict[str, frozenset[str]]] = None
+_file_types_lock = threading.Lock()
+
+
+def classify(path: str) -> Optional[str]:
+    # one suffix slice and a set lookup, cheap enough for crawling
+    # millions of candidate paths; containers in both sets are video
+    file_types = get_file_types()
+    suffix = get_suffix(path)
+    if suffix in file_types["video"]:
+        return "video"
+    if suffix in file_types["audio"]:
+        return "audio"
+    return None
+
+
+def get_file_types() -> dict[str, frozenset[str]]:
+    global _file_types
+    if _file_types is None:
+        with _file_types_lock:
+            if _file_types is None:
+                _file_types = load_file_types(get_file_types_config())
+    return _file_types
+
+
+def get_file_types_config() -> str:
+    config_path = os.environ.get("FILE_TYPES_CONFIG") or "filetypes.ini"
+    if not os.path.isabs(config_path):
+        config_path = os.path.join(ROOT, config_path)
+    return config_path
+
+
+def get_suffix(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
+
+
+def load_file_types(config_path: str) -> dict[str, frozenset[str]]:
+    try:
+        groups = dict(DEFAULT_FILE_TYPES)
+        if os.path.isfile(config_path):
+            import configparser
+
+            config = configparser.ConfigParser()
+            config.read(config_path, encoding="utf-8")
+            if config.has_section("types"):
+                groups.update(config.items("types"))
+        return {
+            group: parse_suffixes(value) for group, value in groups.items()
+        }
+    except Exception as e:
+        raise zraise(e)
+
+
+def parse_suffixes(value: str) -> frozenset[str]:
+    suffixes = set()
+    for suffix in value.replace(",", " ").split():
+        suffix = suffix.strip().lstrip("*").lower()
+        if suffix:
+            suffixes.add(suffix if suffix.startswith(".") else f".{suffix}")
+    return frozenset(suffixes)
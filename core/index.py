@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+from argparse import Namespace
+from typing import Any, Optional
+
+
+from core.cache import cache_path, get_content_hash
+from core.logger import log
+from core.transcribe import get_model_dtype
+from core.zerr import zlog, zraise
+
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    model TEXT NOT NULL,
+    language TEXT NOT NULL,
+    transcribed REAL NOT NULL,
+    options TEXT NOT NULL DEFAULT ''
+)
+"""
+
+
+def filter_changed(
+    connection: sqlite3.Connection,
+    entries: list[tuple[str, int, int]],
+    modelname: str,
+    lang: str,
+    options: str,
+    seen: Optional[set[str]] = None,
+) -> list[tuple[str, int, int]]:
+    try:
+        # one query for the whole index instead of one per file
+        known = {
+            row[0]: row[1:]
+            for row in connection.execute(
+                "SELECT path, size, mtime_ns, content_hash, outputs, model, "
+                "language, options FROM files"
+            )
+        }
+        changed = []
+        touched = []
+        for entry in entries:
+            row = known.get(entry[0])
+            if row is None or not is_up_to_date(
+                entry, row, modelname, lang, options, seen
+            ):
+                changed.append(entry)
+            elif row[1] != entry[2]:
+                touched.append((entry[2], entry[0]))
+        if touched:
+            # same content under a new mtime, e.g. after a copy; the next
+            # scan need not hash these files again
+            connection.executemany(
+                "UPDATE files SET mtime_ns = ? WHERE path = ?", touched
+            )
+            connection.commit()
+        log(
+            f"Index: {len(entries) - len(changed)} of {len(entries)} files "
+            "already transcribed",
+            success=True,
+        )
+        return changed
+    except Exception as e:
+        raise zraise(e)
+
+
+def get_index_options(args: Namespace) -> str:
+    # everything besides model and language that changes the outputs
+    options = {
+        "chunk": getattr(args, "chunk", 0) or 0,
+        "dtype": get_model_dtype(),
+        "outputfolder": getattr(args, "outputfolder", None),
+        "stream": getattr(args, "stream", 0) or 0,
+        "tracks": getattr(args, "tracks", None),
+        "types": sorted(set(args.type)),
+        "vad": bool(getattr(args, "vad", False)),
+    }
+    return hashlib.sha256(
+        json.dumps(options, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def get_index_path() -> str:
+    return os.path.join(cache_path(), "index.sqlite")
+
+
+def is_up_to_date(
+    entry: tuple[str, int, int],
+    row: tuple[Any, ...],
+    modelname: str,
+    lang: str,
+    options: str,
+    seen: Optional[set[str]] = None,
+) -> bool:
+    size, mtime_ns, content_hash, outputs, model, language, row_options = row
+    if (size, model, language, row_options) != (
+        entry[1],
+        modelname,
+        lang,
+        options,
+    ):
+        return False
+    # a new mtime alone is only a change when the content differs too
+    if mtime_ns != entry[2]:
+        try:
+            if get_content_hash(entry[0]) != content_hash:
+                return False
+        except OSError:
+            return False
+    # outputs next to the inputs were already listed by the crawl
+    return all(
+        (seen is not None and output in seen) or os.path.isfile(output)
+        for output in json.loads(outputs)
+    )
+
+
+def open_index(index_path: Optional[str] = None) -> sqlite3.Connection:
+    try:
+        connection = sqlite3.connect(index_path or get_index_path())
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(INDEX_SCHEMA)
+        columns = [
+            column[1]
+            for column in connection.execute("PRAGMA table_info(files)")
+        ]
+        if "options" not in columns:
+            # rows from before the options were recorded never match, so
+            # those files are transcribed once more
+            connection.execute(
+                "ALTER TABLE files ADD COLUMN options TEXT NOT NULL "
+                "DEFAULT ''"
+            )
+        return connection
+    except Exception as e:
+        raise zraise(e)
+
+
+def record_file(
+    connection: sqlite3.Connection,
+    file_stats: dict[str, Any],
+    modelname: str,
+    lang: str,
+    options: str,
+) -> None:
+    try:
+        file_path = file_stats["file"]
+        file_stat = os.stat(file_path)
+        connection.execute(
+            "INSERT OR REPLACE INTO files "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                file_path,
+                file_stat.st_size,
+                file_stat.st_mtime_ns,
+                file_stats.get("content_hash")
+                or get_content_hash(file_path),
+                json.dumps(file_stats["outputs"]),
+                modelname,
+                lang,
+                time.time(),
+                options,
+            ),
+        )
+        connection.commit()
+    except Exception as e:
+        zlog(e)
@@ -1,15 +1,79 @@
+import atexit
+import json
 import os
-import re
+import queue
+import threading
 
-from datetime import datetime
-from icecream import ic
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, TextIO
 
 
-def get_log_path() -> str:
+_handle: Optional[TextIO] = None
+_handle_date: Optional[date] = None
+_records: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def close_log_handle() -> None:
+    global _handle, _handle_date
+    if _handle is not None:
+        _handle.close()
+    _handle = None
+    _handle_date = None
+
+
+def flush_log() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer.is_alive():
+            _records.put(None)
+            _writer.join()
+        _writer = None
+
+
+def format_record(
+    now: datetime, log_message: str, level: str, success: bool
+) -> str:
+    timestamp = now.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if os.environ.get("LOG_FORMAT", "text") == "json":
+        return (
+            json.dumps(
+                {
+                    "time": timestamp,
+                    "level": "INFO" if success else level,
+                    "success": success,
+                    "message": str(log_message),
+                }
+            )
+            + "\n"
+        )
+    if success:
+        return f"[{timestamp}] [INFO] Success: {log_message}\n"
+    return f"[{timestamp}] [{level}] Error: {log_message}\n"
+
+
+def get_log_handle(now: datetime) -> TextIO:
+    global _handle, _handle_date
+    # the log file only changes when the date does, so the path, directory
+    # checks and open() happen once a day instead of once per message
+    if _handle is None or _handle_date != now.date():
+        close_log_handle()
+        log_file = get_log_path(now)
+        is_new_file = not os.path.exists(log_file)
+        _handle = open(log_file, "a")
+        _handle_date = now.date()
+        if is_new_file and os.environ.get("LOG_FORMAT", "text") != "json":
+            _handle.write(
+                f"[{now.strftime('%Y-%m-%d %H:%M:%S.%f')}] "
+                f"***START_OF_LOG for {now.strftime('%Y-%m-%d')}***.\n"
+            )
+    return _handle
+
+
+def get_log_path(now: Optional[datetime] = None) -> str:
     log_dir = os.path.join(os.getcwd(), os.getenv("LOG_DIR", ".logs"))
-    today = str(fix_datetime(datetime.utcnow())).split(" ")[0]
-    time_stamp = re.sub(r"\W+", "", str(today))
+    time_stamp = (now or datetime.utcnow()).strftime("%Y%m%d")
 
     if os.path.exists(log_dir) and not os.path.isdir(log_dir):
         raise Exception(f"[{log_dir}] already exists as a file.")
@@ -30,25 +94,56 @@ def log(
     console: bool = False,
 ) -> None:
     console = True if os.environ.get("FORCE_DEBUG") == "True" else console
-    today = str(fix_datetime(datetime.utcnow())).split(" ")[0]
-    now = fix_datetime(datetime.utcnow(), milliseconds=True)
+    now = datetime.utcnow()
 
     if console:
-        ic(f"[{now}] {level}: {log_message}")
+        from icecream import ic
 
-    try:
-        log_file = get_log_path()
-        is_new_file = not os.path.exists(log_file)
+        ic(f"[{now.strftime('%Y-%m-%d %H:%M:%S.%f')}] {level}: {log_message}")
 
-        with open(log_file, "a") as f:
-            if is_new_file:
-                f.write(f"[{now}] ***START_OF_LOG for {today}***.\n")
-            if success:
-                f.write(f"[{now}] [INFO] Success: {log_message}\n")
-            else:
-                f.write(f"[{now}] [{level}] Error: {log_message}\n")
-    except Exception as e:
-        ic(f"[{now}] [{level}] Error: {log_message} | Exception: {e}")
+    start_writer()
+    _records.put((now, log_message, level, success))
+
+
+def reset_after_fork() -> None:
+    global _handle, _handle_date, _records, _writer, _writer_lock
+    # the parent's writer thread does not exist in a forked child
+    _handle = None
+    _handle_date = None
+    _records = queue.SimpleQueue()
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+def start_writer() -> None:
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(
+                target=write_records, name="log-writer", daemon=True
+            )
+            _writer.start()
+
+
+def write_records() -> None:
+    while True:
+        record = _records.get()
+        if record is None:
+            break
+        now, log_message, level, success = record
+        try:
+            get_log_handle(now).write(
+                format_record(now, log_message, level, success)
+            )
+            if _records.empty() and _handle is not None:
+                _handle.flush()
+        except Exception as e:
+            from icecream import ic
+
+            ic(f"[{now}] [{level}] Error: {log_message} | Exception: {e}")
+    close_log_handle()
 
 
 def fix_datetime(
@@ -57,13 +152,14 @@ def fix_datetime(
     try:
         if isinstance(input_time, (int, float)):
             input_time = datetime.fromtimestamp(input_time / 1000)
-        else:
-            input_time = datetime.strptime(
-                str(input_time), "%Y-%m-%d %H:%M:%S.%f"
-            )
         if milliseconds:
             return input_time.strftime("%Y-%m-%d %H:%M:%S.%f")
         else:
             return input_time.strftime("%Y-%m-%d %H:%M:%S")
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError, AttributeError) as e:
         raise Exception(f"Failed to format datetime: {e}")
+
+
+atexit.register(flush_log)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_after_fork)
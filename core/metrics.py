@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+
+
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional
+
+
+from core.utils import get_os
+from core.zerr import zraise
+
+
+_current = threading.local()
+
+
+class JobReport:
+    def __init__(self, job: str):
+        self.job = job
+        self.pid = os.getpid()
+        self.thread = threading.get_ident()
+        self.started = time.time()
+        self.depth = 0
+        self.spans: list[dict[str, Any]] = []
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job": self.job,
+            "pid": self.pid,
+            "thread": self.thread,
+            "started": self.started,
+            "seconds": time.time() - self.started,
+            "spans": self.spans,
+        }
+
+
+def add_report_totals(
+    totals: dict[str, Any], report: Optional[dict[str, Any]]
+) -> None:
+    if report is None:
+        return
+    totals["jobs"] = totals.get("jobs", 0) + 1
+    stages = totals.setdefault("stages", {})
+    for span in report["spans"]:
+        stage = stages.setdefault(
+            span["stage"],
+            {
+                "seconds": 0.0,
+                "calls": 0,
+                "read_bytes": 0,
+                "written_bytes": 0,
+                "peak_rss_bytes": 0,
+            },
+        )
+        stage["seconds"] += span["seconds"]
+        stage["calls"] += 1
+        stage["read_bytes"] += span.get("read_bytes") or 0
+        stage["written_bytes"] += span.get("written_bytes") or 0
+        stage["peak_rss_bytes"] = max(
+            stage["peak_rss_bytes"], span.get("peak_rss_bytes") or 0
+        )
+
+
+def finish_job_report() -> Optional[dict[str, Any]]:
+    report = getattr(_current, "report", None)
+    _current.report = None
+    return report.to_dict() if report is not None else None
+
+
+def format_chrome_trace(reports: Iterable[dict[str, Any]]) -> str:
+    events = []
+    for report in reports:
+        for span in report["spans"]:
+            events.append(
+                {
+                    "name": span["stage"],
+                    "cat": "transcriptgen",
+                    "ph": "X",
+                    "ts": int(span["started"] * 1e6),
+                    "dur": int(span["seconds"] * 1e6),
+                    "pid": report["pid"],
+                    "tid": report["thread"],
+                    "args": {
+                        key: value
+                        for key, value in span.items()
+                        if key
+                        not in ("stage", "started", "seconds", "depth")
+                    }
+                    | {"job": report["job"]},
+                }
+            )
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+def format_prometheus(reports: Iterable[dict[str, Any]]) -> str:
+    totals: dict[str, Any] = {}
+    for report in reports:
+        add_report_totals(totals, report)
+    return format_prometheus_totals(totals)
+
+
+def format_prometheus_totals(totals: dict[str, Any]) -> str:
+    metrics = [
+        ("seconds", "counter", "Time spent in each pipeline stage"),
+        ("calls", "counter", "Number of times each stage ran"),
+        ("read_bytes", "counter", "Bytes read while each stage ran"),
+        ("written_bytes", "counter", "Bytes written while each stage ran"),
+        ("peak_rss_bytes", "gauge", "Highest peak RSS seen in each stage"),
+    ]
+    lines = [
+        "# HELP transcriptgen_jobs_total Jobs with a timing report",
+        "# TYPE transcriptgen_jobs_total counter",
+        f"transcriptgen_jobs_total {totals.get('jobs', 0)}",
+    ]
+    for field, metric_type, description in metrics:
+        suffix = "_total" if metric_type == "counter" else ""
+        name = f"transcriptgen_stage_{field}{suffix}"
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for stage, values in sorted(totals.get("stages", {}).items()):
+            lines.append(f'{name}{{stage="{stage}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def get_io_counters() -> tuple[Optional[int], Optional[int]]:
+    # rchar/wchar count every read/write syscall, including the ffmpeg
+    # pipes, which is what a stage actually moves through this process
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def get_peak_rss() -> int:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if get_os() == "Darwin" else peak * 1024
+
+
+def reset_peak_rss() -> None:
+    # Linux resets VmHWM to the current RSS, giving a per-stage peak
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    report = getattr(_current, "report", None)
+    record: dict[str, Any] = {"stage": stage, **attributes}
+    if report is None:
+        yield record
+        return
+
+    # nested spans (a model load inside transcription) must not reset the
+    # high-water mark of the stage that encloses them
+    if report.depth == 0:
+        reset_peak_rss()
+    record["depth"] = report.depth
+    report.depth += 1
+    read_start, written_start = get_io_counters()
+    record["started"] = time.time()
+    span_start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        report.depth -= 1
+        record["seconds"] = time.perf_counter() - span_start
+        read_end, written_end = get_io_counters()
+        if read_start is not None and read_end is not None:
+            record["read_bytes"] = read_end - read_start
+        if written_start is not None and written_end is not None:
+            record["written_bytes"] = written_end - written_start
+        record["peak_rss_bytes"] = get_peak_rss()
+        report.spans.append(record)
+
+
+def start_job_report(job: str) -> JobReport:
+    _current.report = JobReport(job)
+    return _current.report
+
+
+def write_reports(
+    reports: list[dict[str, Any]],
+    report_path: Optional[str] = None,
+    prometheus_path: Optional[str] = None,
+    trace_path: Optional[str] = None,
+) -> None:
+    try:
+        if report_path:
+            with open(report_path, "w") as f:
+                for report in reports:
+                    f.write(json.dumps(report) + "\n")
+        if prometheus_path:
+            with open(prometheus_path, "w") as f:
+                f.write(format_prometheus(reports))
+        if trace_path:
+            with open(trace_path, "w") as f:
+                f.write(format_chrome_trace(reports))
+    except Exception as e:
+        raise zraise(e)
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+
+
+from typing import Any
+
+
+from core.cache import (
+    add_cache_bytes,
+    cache_path,
+    PROBE_DIR,
+    PROBE_EXTENSION,
+)
+from core.logger import log
+from core.utils import get_ffmpeg_path
+from core.zerr import zlog, zraise
+
+
+PROBE_VERSION = 1
+
+_probes: dict[tuple[str, int, int], dict[str, Any]] = {}
+_probes_lock = threading.Lock()
+
+
+def get_audio_stream(
+    media: dict[str, Any], stream: int = 0
+) -> dict[str, Any]:
+    audio_streams = media["audio_streams"]
+    if not audio_streams:
+        raise Exception(f"[{media['path']}] does not contain audio")
+    if stream < 0 or stream >= len(audio_streams):
+        raise Exception(
+            f"[{media['path']}] has {len(audio_streams)} audio stream(s), "
+            f"stream {stream} does not exist"
+        )
+    return audio_streams[stream]
+
+
+def get_media_duration(filepath: str) -> float:
+    try:
+        return probe_media(filepath)["duration"]
+    except Exception as e:
+        zlog(e)
+        return 0.0
+
+
+def get_probe_file(key: tuple[str, int, int]) -> str:
+    digest = hashlib.sha256(
+        json.dumps([PROBE_VERSION, *key]).encode("utf-8")
+    ).hexdigest()
+    return os.path.join(
+        cache_path(), PROBE_DIR, digest[:2], f"{digest}{PROBE_EXTENSION}"
+    )
+
+
+def get_probe_key(filepath: str) -> tuple[str, int, int]:
+    # a rewritten file changes size or mtime, which is enough to re-probe
+    # without hashing the content like the transcription cache does
+    file_stat = os.stat(filepath)
+    return (
+        os.path.abspath(filepath),
+        file_stat.st_mtime_ns,
+        file_stat.st_size,
+    )
+
+
+def parse_probe(filepath: str, probe: dict[str, Any]) -> dict[str, Any]:
+    media_format = probe.get("format") or {}
+    streams = probe.get("streams") or []
+    audio_streams = []
+    for stream in streams:
+        if stream.get("codec_type") != "audio":
+            continue
+        tags = stream.get("tags") or {}
+        audio_streams.append(
+            {
+                "index": stream.get("index"),
+                "codec": stream.get("codec_name"),
+                "sample_rate": int(stream.get("sample_rate") or 0),
+                "channels": int(stream.get("channels") or 0),
+                "language": tags.get("language"),
+                "title": tags.get("title"),
+                "duration": float(stream.get("duration") or 0.0),
+            }
+        )
+    duration = float(media_format.get("duration") or 0.0)
+    if duration == 0.0 and audio_streams:
+        duration = max(stream["duration"] for stream in audio_streams)
+    return {
+        "path": filepath,
+        "container": media_format.get("format_name"),
+        "duration": duration,
+        "codecs": [stream.get("codec_name") for stream in streams],
+        "audio_streams": audio_streams,
+        "video_streams": sum(
+            1
+            for stream in streams
+            if stream.get("codec_type") == "video"
+            and not (stream.get("disposition") or {}).get("attached_pic")
+        ),
+    }
+
+
+def probe_media(filepath: str) -> dict[str, Any]:
+    try:
+        key = get_probe_key(filepath)
+        with _probes_lock:
+            media = _probes.get(key)
+        if media is not None:
+            return media
+
+        probe_file = get_probe_file(key)
+        if os.path.isfile(probe_file):
+            with open(probe_file, "r", encoding="utf-8") as f:
+                media = json.load(f)
+            os.utime(probe_file)  # mark as most recently used for eviction
+        else:
+            media = run_ffprobe(filepath)
+            os.makedirs(os.path.dirname(probe_file), exist_ok=True)
+            partial_file = f"{probe_file}.{os.getpid()}.partial"
+            with open(partial_file, "w", encoding="utf-8") as f:
+                json.dump(media, f)
+            os.replace(partial_file, probe_file)
+            add_cache_bytes(os.path.getsize(probe_file))
+
+        with _probes_lock:
+            _probes[key] = media
+        return media
+    except Exception as e:
+        raise zraise(e)
+
+
+def run_ffprobe(filepath: str) -> dict[str, Any]:
+    # only the container header is read; nothing is decoded
+    command = [
+        get_ffmpeg_path("ffprobe"),
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        filepath,
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise Exception(
+            f"[{filepath}] is not a readable media file: "
+            f"{completed.stderr.strip()}"
+        )
+    media = parse_probe(filepath, json.loads(completed.stdout or "{}"))
+    log(
+        f"Probed [{filepath}]: {media['container']}, "
+        f"{media['duration']:.1f}s, "
+        f"{len(media['audio_streams'])} audio stream(s)",
+        success=True,
+    )
+    return media
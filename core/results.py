@@ -0,0 +1,200 @@
+import json
+import struct
+
+
+from typing import Any
+
+
+from core.zerr import zraise
+
+
+ALIGNMENT = 64
+MAGIC = b"TGRESULT"
+RESULT_VERSION = 1
+
+
+def align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def arrays_to_result(arrays: dict[str, Any]) -> dict[str, Any]:
+    try:
+        blob = bytes(arrays["text_blob"])
+
+        def text(span) -> str:
+            return blob[int(span[0]) : int(span[1])].decode("utf-8")
+
+        segments = []
+        word_offsets = arrays["segment_word_offsets"]
+        for index in range(len(arrays["segment_times"])):
+            words = []
+            for word in range(
+                int(word_offsets[index]), int(word_offsets[index + 1])
+            ):
+                words.append(
+                    {
+                        "text": text(arrays["word_text_spans"][word]),
+                        "start": float(arrays["word_times"][word][0]),
+                        "end": float(arrays["word_times"][word][1]),
+                        "confidence": float(arrays["word_confidence"][word]),
+                    }
+                )
+            segments.append(
+                {
+                    "id": index,
+                    "start": float(arrays["segment_times"][index][0]),
+                    "end": float(arrays["segment_times"][index][1]),
+                    "text": text(arrays["segment_text_spans"][index]),
+                    "confidence": float(
+                        arrays["segment_confidence"][index]
+                    ),
+                    "words": words,
+                }
+            )
+        return {
+            "text": text(arrays["result_text_span"]),
+            "segments": segments,
+            "language": arrays["language"],
+            "duration": arrays["duration"],
+        }
+    except Exception as e:
+        raise zraise(e)
+
+
+def get_data_start(header_size: int) -> int:
+    return align(len(MAGIC) + 4 + header_size)
+
+
+def load_result(filepath: str) -> dict[str, Any]:
+    return arrays_to_result(load_result_arrays(filepath))
+
+
+def load_result_arrays(filepath: str, mmap: bool = True) -> dict[str, Any]:
+    try:
+        import numpy as np
+
+        with open(filepath, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise Exception(f"[{filepath}] is not a transcription result")
+            (header_size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        if header["version"] != RESULT_VERSION:
+            raise Exception(
+                f"[{filepath}] has result schema version "
+                f"{header['version']}, expected {RESULT_VERSION}"
+            )
+
+        data = (
+            np.memmap(filepath, dtype=np.uint8, mode="r")
+            if mmap
+            else np.fromfile(filepath, dtype=np.uint8)
+        )
+        data_start = get_data_start(header_size)
+        arrays: dict[str, Any] = {
+            "language": header["language"],
+            "duration": header["duration"],
+            "result_text_span": header["result_text_span"],
+        }
+        for name, spec in header["arrays"].items():
+            arrays[name] = np.ndarray(
+                shape=tuple(spec["shape"]),
+                dtype=np.dtype(spec["dtype"]),
+                buffer=data,
+                offset=data_start + spec["offset"],
+            )
+        return arrays
+    except Exception as e:
+        raise zraise(e)
+
+
+def result_to_arrays(result: dict[str, Any]) -> dict[str, Any]:
+    try:
+        import numpy as np
+
+        blob = bytearray()
+
+        def add_text(text: str) -> tuple[int, int]:
+            start = len(blob)
+            blob.extend(str(text).encode("utf-8"))
+            return start, len(blob)
+
+        segments = result.get("segments") or []
+        words = [
+            (word, segment_index)
+            for segment_index, segment in enumerate(segments)
+            for word in segment.get("words") or []
+        ]
+        word_counts = [len(segment.get("words") or []) for segment in segments]
+        return {
+            "language": result.get("language"),
+            "duration": result.get("duration"),
+            "segment_times": np.array(
+                [[seg["start"], seg["end"]] for seg in segments],
+                dtype=np.float64,
+            ).reshape(-1, 2),
+            "segment_confidence": np.array(
+                [seg.get("confidence", np.nan) for seg in segments],
+                dtype=np.float32,
+            ),
+            "segment_text_spans": np.array(
+                [add_text(seg["text"]) for seg in segments], dtype=np.int64
+            ).reshape(-1, 2),
+            "segment_word_offsets": np.concatenate(
+                [[0], np.cumsum(word_counts, dtype=np.int64)]
+            ).astype(np.int64),
+            "word_times": np.array(
+                [[word["start"], word["end"]] for word, _ in words],
+                dtype=np.float64,
+            ).reshape(-1, 2),
+            "word_confidence": np.array(
+                [word.get("confidence", np.nan) for word, _ in words],
+                dtype=np.float32,
+            ),
+            "word_text_spans": np.array(
+                [add_text(word["text"]) for word, _ in words], dtype=np.int64
+            ).reshape(-1, 2),
+            "result_text_span": add_text(result.get("text", "")),
+            "text_blob": np.frombuffer(bytes(blob), dtype=np.uint8),
+        }
+    except Exception as e:
+        raise zraise(e)
+
+
+def save_result(filepath: str, result: dict[str, Any]) -> None:
+    try:
+        arrays = result_to_arrays(result)
+        names = [name for name in arrays if hasattr(arrays[name], "dtype")]
+        # offsets are relative to the data section, which starts on an
+        # aligned boundary after the header so mmap views stay aligned
+        specs = {}
+        data_size = 0
+        for name in names:
+            offset = align(data_size)
+            specs[name] = {
+                "dtype": arrays[name].dtype.str,
+                "shape": list(arrays[name].shape),
+                "offset": offset,
+            }
+            data_size = offset + arrays[name].nbytes
+
+        header_bytes = json.dumps(
+            {
+                "version": RESULT_VERSION,
+                "language": arrays["language"],
+                "duration": arrays["duration"],
+                "result_text_span": list(arrays["result_text_span"]),
+                "arrays": specs,
+            }
+        ).encode("utf-8")
+        data_start = get_data_start(len(header_bytes))
+
+        with open(filepath, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for name in names:
+                f.seek(data_start + specs[name]["offset"])
+                f.write(arrays[name].tobytes())
+            f.truncate(data_start + data_size)
+    except Exception as e:
+        raise zraise(e)
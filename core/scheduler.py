@@ -0,0 +1,208 @@
+import multiprocessing
+import os
+import time
+
+
+from argparse import Namespace
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+
+from core.logger import log
+from core.probe import get_media_duration
+from core.zerr import zlog, zraise
+
+
+_worker_model: Optional[Any] = None
+_worker_model_seconds = 0.0
+
+
+def format_progress(
+    index: int,
+    total: int,
+    done_seconds: float,
+    total_seconds: float,
+    elapsed: float,
+) -> str:
+    if done_seconds <= 0 or total_seconds <= 0:
+        return f"[{index}/{total}]"
+    # audio duration, not file count, is what the remaining time scales with
+    remaining = elapsed * (total_seconds - done_seconds) / done_seconds
+    return (
+        f"[{index}/{total}, {done_seconds / total_seconds:.0%} of audio, "
+        f"ETA {remaining:.0f}s]"
+    )
+
+
+def get_durations(file_paths: list[str]) -> dict[str, float]:
+    return {
+        file_path: get_media_duration(file_path) for file_path in file_paths
+    }
+
+
+def get_worker_pool(
+    workers: int, modelname: str, threads: int
+) -> ProcessPoolExecutor:
+    # spawn, because forking a process that already initialised torch can
+    # deadlock its thread pools
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(modelname, threads),
+    )
+
+
+def get_threads_per_worker(workers: int, threads: Optional[int] = None) -> int:
+    if threads is not None and threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def init_worker(modelname: str, threads: int) -> None:
+    global _worker_model, _worker_model_seconds
+    import torch
+
+    from core.transcribe import get_model
+
+    torch.set_num_threads(threads)
+    load_start = time.perf_counter()
+    _worker_model = get_model(modelname)
+    _worker_model_seconds = time.perf_counter() - load_start
+
+
+def order_longest_first(
+    file_paths: list[str], durations: dict[str, float]
+) -> list[str]:
+    # longest jobs go first so the run does not end waiting on one worker;
+    # bitrates vary too much between containers for file size to be a guide
+    return sorted(file_paths, key=lambda path: durations[path], reverse=True)
+
+
+def run_job(file_path: str, args: Namespace) -> dict[str, Any]:
+    from core.app import process_file
+
+    job_start = time.perf_counter()
+    job = {
+        "file": file_path,
+        "pid": os.getpid(),
+        "model_seconds": _worker_model_seconds,
+    }
+    # this worker already owns its share of the cores: chunks and tracks
+    # run in process on its model instead of nesting another pool with
+    # more model copies and threads than the oversubscription check sees
+    args = Namespace(**{**vars(args), "chunk_workers": 1})
+    try:
+        job["stats"] = process_file(file_path, args, model=_worker_model)
+        job["error"] = None
+    except Exception as e:
+        job["stats"] = None
+        job["error"] = zlog(e)
+    job["busy_seconds"] = time.perf_counter() - job_start
+    return job
+
+
+def schedule_files(
+    file_paths: list[str],
+    args: Namespace,
+    workers: int,
+    threads: Optional[int] = None,
+    on_complete: Optional[Callable[[dict[str, Any]], None]] = None,
+) -> dict[str, Any]:
+    try:
+        threads = get_threads_per_worker(workers, threads)
+        if workers * threads > (os.cpu_count() or 1):
+            log(
+                f"{workers} workers x {threads} threads oversubscribes "
+                f"{os.cpu_count()} cores",
+                "WARNING",
+            )
+        run_start = time.perf_counter()
+        durations = get_durations(file_paths)
+        total_seconds = sum(durations.values())
+        done_seconds = 0.0
+        completed = []
+        failed = []
+        busy_by_worker: dict[int, float] = {}
+        model_seconds = 0.0
+
+        def finish(file_path: str, job: Optional[dict[str, Any]]) -> None:
+            nonlocal done_seconds, model_seconds
+            done_seconds += durations[file_path]
+            progress = format_progress(
+                len(completed) + len(failed) + 1,
+                len(file_paths),
+                done_seconds,
+                total_seconds,
+                time.perf_counter() - run_start,
+            )
+            if job is not None:
+                busy_by_worker[job["pid"]] = (
+                    busy_by_worker.get(job["pid"], 0.0) + job["busy_seconds"]
+                )
+                model_seconds = max(model_seconds, job["model_seconds"])
+            if job is not None and job["error"] is None:
+                completed.append(job["stats"])
+                if on_complete is not None:
+                    on_complete(job["stats"])
+                print(f"{progress} {file_path} done")
+            else:
+                failed.append(file_path)
+                print(f"{progress} FAILED: {file_path}")
+
+        crashed = []
+        with get_worker_pool(workers, args.model, threads) as pool:
+            futures = {
+                pool.submit(run_job, file_path, args): file_path
+                for file_path in order_longest_first(file_paths, durations)
+            }
+            for future in as_completed(futures):
+                try:
+                    finish(futures[future], future.result())
+                except BrokenProcessPool:
+                    # a worker was killed (e.g. out of memory); every job
+                    # still in the pool fails with it
+                    crashed.append(futures[future])
+
+        if crashed:
+            log(
+                f"A worker process died, retrying {len(crashed)} file(s) "
+                "one at a time",
+                "WARNING",
+            )
+        # with a single job in flight a crash names the file that caused
+        # it, so only that one fails and the pool is rebuilt for the rest
+        retry_pool: Optional[ProcessPoolExecutor] = None
+        try:
+            for file_path in order_longest_first(crashed, durations):
+                if retry_pool is None:
+                    retry_pool = get_worker_pool(1, args.model, threads)
+                try:
+                    job = retry_pool.submit(run_job, file_path, args).result()
+                except BrokenProcessPool:
+                    log(
+                        f"Worker process died transcribing [{file_path}]",
+                        "ERROR",
+                    )
+                    retry_pool.shutdown()
+                    retry_pool = None
+                    job = None
+                finish(file_path, job)
+        finally:
+            if retry_pool is not None:
+                retry_pool.shutdown()
+
+        seconds = time.perf_counter() - run_start
+        return {
+            "completed": completed,
+            "failed": failed,
+            "model_seconds": model_seconds,
+            "seconds": seconds,
+            "utilisation": {
+                pid: busy / seconds if seconds > 0 else 0.0
+                for pid, busy in busy_by_worker.items()
+            },
+        }
+    except Exception as e:
+        raise zraise(e)
@@ -0,0 +1,156 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+from core.logger import log
+from core.utils import get_os, scratch_path
+from core.zerr import zlog, zraise
+
+
+SCRATCH_RESERVE_BYTES = 256 * 1024**2
+TMPFS_DIR = "/dev/shm"
+WAV_BYTES_PER_SECOND = 16000 * 2  # 16 kHz mono s16le, what ffmpeg writes
+
+_current = threading.local()
+_reserved_bytes = 0
+_reserved_lock = threading.Lock()
+_stale_checked: set[str] = set()
+
+
+def clean_stale_scratch(root: str) -> None:
+    # a killed job cannot clean up after itself; its directory is removed
+    # by the next job on the same host once the owning process is gone
+    if root in _stale_checked or get_os() == "Windows":
+        return
+    _stale_checked.add(root)
+    prefix = f"job-{socket.gethostname()}-"
+    try:
+        for name in os.listdir(root):
+            if not name.startswith(prefix):
+                continue
+            pid = name[len(prefix) :].split("-", 1)[0]
+            if pid.isdigit() and not is_process_alive(int(pid)):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+                log(
+                    f"Removed stale scratch directory [{name}]", success=True
+                )
+    except OSError as e:
+        zlog(e, "WARNING")
+
+
+def ensure_scratch_space(seconds: float, streams: int = 1) -> str:
+    try:
+        required = estimate_wav_bytes(seconds, streams)
+        tmpfs_root = get_tmpfs_root()
+        with _reserved_lock:
+            # small intermediates go to memory-backed storage when enabled
+            if tmpfs_root is not None and required <= get_tmpfs_limit():
+                if get_free_bytes(tmpfs_root) - _reserved_bytes > required:
+                    reserve_bytes(required)
+                    return get_job_dir(tmpfs_root)
+            root = scratch_path()
+            free_bytes = get_free_bytes(root) - _reserved_bytes
+            if free_bytes - required < SCRATCH_RESERVE_BYTES:
+                raise Exception(
+                    f"Not enough scratch space in [{root}]: "
+                    f"{required / 1024**2:.0f} MB needed for "
+                    f"{seconds:.0f}s x {streams} stream(s), "
+                    f"{max(free_bytes, 0) / 1024**2:.0f} MB free"
+                )
+            reserve_bytes(required)
+            return get_job_dir(root)
+    except Exception as e:
+        raise zraise(e)
+
+
+def estimate_wav_bytes(seconds: float, streams: int = 1) -> int:
+    return int(seconds * WAV_BYTES_PER_SECOND * max(1, streams))
+
+
+def get_free_bytes(directory: str) -> int:
+    return shutil.disk_usage(directory).free
+
+
+def get_job_dir(root: str) -> str:
+    directories = getattr(_current, "directories", None)
+    if directories is None:
+        # outside a job, callers share the scratch root as before
+        return root
+    if root not in directories:
+        clean_stale_scratch(root)
+        directories[root] = tempfile.mkdtemp(
+            prefix=(
+                f"job-{socket.gethostname()}-{os.getpid()}-"
+                f"{threading.get_ident()}-"
+            ),
+            dir=root,
+        )
+    return directories[root]
+
+
+def get_tmpfs_limit() -> int:
+    try:
+        return int(
+            float(os.environ.get("SCRATCH_TMPFS_MB", "256")) * 1024**2
+        )
+    except ValueError:
+        return 256 * 1024**2
+
+
+def get_tmpfs_root() -> Optional[str]:
+    if os.environ.get("SCRATCH_TMPFS", "False") != "True":
+        return None
+    if not os.path.isdir(TMPFS_DIR):
+        return None
+    tmpfs_root = os.path.join(TMPFS_DIR, "transcriptgen")
+    os.makedirs(tmpfs_root, exist_ok=True)
+    return tmpfs_root
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def job_scratch(job: str) -> Iterator[None]:
+    global _reserved_bytes
+    previous = (
+        getattr(_current, "directories", None),
+        getattr(_current, "reserved", 0),
+    )
+    _current.directories = {}
+    _current.reserved = 0
+    try:
+        yield
+    finally:
+        # only this job's directories, also when the job failed, so
+        # concurrent jobs keep their in-flight files
+        for directory in _current.directories.values():
+            shutil.rmtree(directory, ignore_errors=True)
+        if _current.directories:
+            log(f"Scratch for [{job}] cleaned up", success=True)
+        with _reserved_lock:
+            _reserved_bytes -= _current.reserved
+        _current.directories, _current.reserved = previous
+
+
+def reserve_bytes(required: int) -> None:
+    global _reserved_bytes
+    # callers hold _reserved_lock
+    if getattr(_current, "directories", None) is None:
+        return
+    _reserved_bytes += required
+    _current.reserved = getattr(_current, "reserved", 0) + required
@@ -0,0 +1,368 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+
+
+from argparse import Namespace
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+from core.audio import get_audio_path
+from core.cache import (
+    cache_lookup,
+    cache_store,
+    get_cache_key,
+    get_cache_options,
+)
+from core.logger import log
+from core.probe import get_audio_stream, probe_media
+from core.metrics import (
+    add_report_totals,
+    finish_job_report,
+    format_prometheus_totals,
+    span,
+    start_job_report,
+)
+from core.transcribe import (
+    get_language as get_lang,
+    get_model,
+    get_model_stats,
+    transcribe_audio,
+)
+from core.utils import (
+    get_extension,
+    scratch_path as get_temp_dir,
+)
+from core.writers import iter_transcription as iter_tx, OUTPUT_TYPES
+from core.zerr import zlog, zraise
+
+
+MAX_FINISHED_JOBS = 1000
+UPLOAD_BLOCK_SIZE = 1024**2
+
+_jobs: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+_jobs_lock = threading.Lock()
+# finished jobs are pruned, so counters are kept apart from them to never
+# go backwards
+_metrics_lock = threading.Lock()
+_metrics_totals: dict[str, Any] = {}
+_queue: "queue.Queue[str]" = queue.Queue()
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ThreadingUnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    server_version = "TranscriptGen"
+
+    def address_string(self) -> str:
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def do_GET(self):
+        try:
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split("/") if part]
+            if parts == ["health"]:
+                self.send_json(
+                    200,
+                    {
+                        "queued": _queue.qsize(),
+                        "capacity": _queue.maxsize,
+                        "models": get_model_stats(),
+                    },
+                )
+            elif parts == ["metrics"]:
+                self.send_metrics()
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = get_job(parts[1])
+                if job is None:
+                    self.send_json(404, {"error": "Unknown job"})
+                else:
+                    self.send_json(200, get_job_status(job))
+            elif len(parts) == 3 and parts[::2] == ["jobs", "result"]:
+                self.send_result(parts[1], parse_qs(url.query))
+            else:
+                self.send_json(404, {"error": "Not found"})
+        except Exception as e:
+            zlog(e)
+            self.send_json(500, {"error": str(e)})
+
+    def do_POST(self):
+        try:
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/jobs":
+                self.send_json(404, {"error": "Not found"})
+                return
+            if _queue.full():
+                self.send_json(
+                    503, {"error": "Job queue is full"}, {"Retry-After": "5"}
+                )
+                return
+            job = self.read_job(parse_qs(url.query))
+            try:
+                submit_job(job)
+            except queue.Full:
+                discard_upload(job)
+                self.send_json(
+                    503, {"error": "Job queue is full"}, {"Retry-After": "5"}
+                )
+                return
+            self.send_json(202, get_job_status(job))
+        except Exception as e:
+            zlog(e)
+            self.send_json(400, {"error": str(e)})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log(f"{self.address_string()} {format % args}", success=True)
+
+    def read_job(self, query: dict[str, list[str]]) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        defaults = self.server.defaults  # type: ignore[attr-defined]
+        if self.headers.get("Content-Type", "").startswith(
+            "application/json"
+        ):
+            request = json.loads(self.rfile.read(length) or b"{}")
+            file_path = request.get("path")
+            if not file_path or not os.path.isfile(file_path):
+                raise Exception(f"[{file_path}] is not a readable file")
+            upload = False
+        else:
+            request = {key: values[0] for key, values in query.items()}
+            filename = os.path.basename(request.get("filename", ""))
+            if filename == "":
+                raise Exception("Uploads need a ?filename= query parameter")
+            upload_dir = os.path.join(get_temp_dir(), "uploads")
+            os.makedirs(upload_dir, exist_ok=True)
+            file_path = os.path.join(
+                upload_dir, f"{uuid.uuid4().hex}_{filename}"
+            )
+            with open(file_path, "wb") as f:
+                remaining = length
+                while remaining > 0:
+                    block = self.rfile.read(min(remaining, UPLOAD_BLOCK_SIZE))
+                    if not block:
+                        break
+                    f.write(block)
+                    remaining -= len(block)
+            upload = True
+
+        stream = int(request.get("stream") or 0)
+        try:
+            # rejected here, with a 400, instead of failing in the queue
+            get_audio_stream(probe_media(file_path), stream)
+        except Exception:
+            if upload:
+                os.remove(file_path)
+            raise
+
+        return {
+            "id": uuid.uuid4().hex,
+            "file": file_path,
+            "upload": upload,
+            "stream": stream,
+            "model": request.get("model") or defaults.model,
+            "language": get_lang(request.get("language") or defaults.language),
+            "status": "queued",
+            "error": None,
+            "result": None,
+            "report": None,
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+        }
+
+    def send_json(
+        self,
+        status: int,
+        data: dict[str, Any],
+        headers: Optional[dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_metrics(self) -> None:
+        with _metrics_lock:
+            body = format_prometheus_totals(_metrics_totals).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_result(self, job_id: str, query: dict[str, list[str]]) -> None:
+        job = get_job(job_id)
+        if job is None:
+            self.send_json(404, {"error": "Unknown job"})
+            return
+        if job["status"] != "done":
+            self.send_json(409, get_job_status(job))
+            return
+        requested_type = query.get("type", ["2"])[0]
+        # a bad type is the client's error, answered before any output
+        if not requested_type.isdigit() or (
+            int(requested_type) not in OUTPUT_TYPES
+        ):
+            self.send_json(
+                400,
+                {
+                    "error": f"Unsupported type [{requested_type}], "
+                    f"expected one of {sorted(OUTPUT_TYPES)}"
+                },
+            )
+            return
+        transcription_type = int(requested_type)
+        chunks = iter_tx(job["result"], transcription_type, job["language"])
+        # HTTP/1.0 without a Content-Length: segments are sent as they are
+        # rendered and the connection is closed at the end
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header(
+            "Content-Disposition",
+            "attachment; filename="
+            f"\"{os.path.basename(job['file'])}"
+            f"{get_extension(transcription_type)}\"",
+        )
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk.encode("utf-8"))
+
+
+def discard_upload(job: dict[str, Any]) -> None:
+    if job["upload"] and os.path.exists(job["file"]):
+        os.remove(job["file"])
+
+
+def get_job(job_id: str) -> Optional[dict[str, Any]]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def get_job_status(job: dict[str, Any]) -> dict[str, Any]:
+    return {
+        key: value
+        for key, value in job.items()
+        if key not in ("result", "upload")
+    }
+
+
+def run_job(job: dict[str, Any]) -> None:
+    job["status"] = "running"
+    job["started"] = time.time()
+    start_job_report(job["id"])
+    try:
+        cache_key = get_cache_key(
+            job["file"],
+            job["model"],
+            job["language"],
+            get_cache_options(job["stream"]),
+        )
+        with span("cache_lookup"):
+            result = cache_lookup(cache_key)
+        if result is None:
+            with span("decode"):
+                audio = get_audio_path(job["file"], job["stream"])
+            model = get_model(job["model"])
+            with span("transcription"):
+                result = transcribe_audio(
+                    audio, job["model"], job["language"], model=model
+                )
+            with span("cache_store"):
+                cache_store(cache_key, result)
+        job["result"] = result
+        job["status"] = "done"
+    except Exception as e:
+        job["error"] = zlog(e)
+        job["status"] = "failed"
+    finally:
+        job["finished"] = time.time()
+        job["report"] = finish_job_report()
+        with _metrics_lock:
+            add_report_totals(_metrics_totals, job["report"])
+        discard_upload(job)
+
+
+def serve(args: Namespace) -> None:
+    global _queue
+    try:
+        _queue = queue.Queue(maxsize=max(1, args.queue_size))
+        get_model(args.model)  # keep the default model warm
+
+        worker = threading.Thread(target=serve_jobs, daemon=True)
+        worker.start()
+
+        if args.socket:
+            if os.path.exists(args.socket):
+                os.remove(args.socket)
+            server = ThreadingUnixHTTPServer(
+                args.socket, TranscriptionHandler
+            )
+            address = args.socket
+        else:
+            host, _, port = str(args.serve).rpartition(":")
+            server = ThreadingHTTPServer(
+                (host or "127.0.0.1", int(port)), TranscriptionHandler
+            )
+            address = f"http://{host or '127.0.0.1'}:{port}"
+        server.defaults = args  # type: ignore[attr-defined]
+
+        log(f"Transcription server listening on [{address}]", success=True)
+        print(f"Listening on {address}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args.socket and os.path.exists(args.socket):
+                os.remove(args.socket)
+    except Exception as e:
+        raise zraise(e)
+
+
+def serve_jobs() -> None:
+    while True:
+        job_id = _queue.get()
+        job = get_job(job_id)
+        if job is not None:
+            run_job(job)
+        _queue.task_done()
+
+
+def submit_job(job: dict[str, Any]) -> None:
+    with _jobs_lock:
+        _queue.put_nowait(job["id"])
+        _jobs[job["id"]] = job
+        # forget the oldest finished jobs so memory stays bounded
+        finished = [
+            job_id
+            for job_id, known_job in _jobs.items()
+            if known_job["status"] in ("done", "failed")
+        ]
+        for job_id in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del _jobs[job_id]
@@ -0,0 +1,121 @@
+import re
+
+
+from typing import Any, Optional
+
+
+from core.probe import get_audio_stream
+from core.zerr import zraise
+
+
+# ffprobe reports the ISO 639-2 tags stored in the container, whisper
+# expects ISO 639-1 codes
+ISO_639_2_LANGUAGES = {
+    "ara": "ar",
+    "chi": "zh",
+    "ces": "cs",
+    "cze": "cs",
+    "dan": "da",
+    "deu": "de",
+    "dut": "nl",
+    "ell": "el",
+    "eng": "en",
+    "fin": "fi",
+    "fra": "fr",
+    "fre": "fr",
+    "ger": "de",
+    "gre": "el",
+    "heb": "he",
+    "hin": "hi",
+    "hun": "hu",
+    "ind": "id",
+    "ita": "it",
+    "jpn": "ja",
+    "kor": "ko",
+    "nld": "nl",
+    "nor": "no",
+    "pol": "pl",
+    "por": "pt",
+    "ron": "ro",
+    "rum": "ro",
+    "rus": "ru",
+    "spa": "es",
+    "swe": "sv",
+    "tha": "th",
+    "tur": "tr",
+    "ukr": "uk",
+    "vie": "vi",
+    "zho": "zh",
+}
+
+
+def get_track_label(stream: int, stream_info: dict[str, Any]) -> str:
+    parts = [f"track{stream}"]
+    for tag in (stream_info.get("language"), stream_info.get("title")):
+        if tag and tag != "und":
+            slug = re.sub(r"[^a-z0-9]+", "-", str(tag).lower()).strip("-")
+            if slug:
+                parts.append(slug)
+    return ".".join(parts)
+
+
+def get_track_language(
+    stream_info: dict[str, Any], default: str, override: Optional[str] = None
+) -> str:
+    if override:
+        return override
+    tag = (stream_info.get("language") or "").lower()
+    if len(tag) == 2:
+        return tag
+    return ISO_639_2_LANGUAGES.get(tag, default)
+
+
+def get_tracks(
+    media: dict[str, Any],
+    tracks: Optional[str],
+    stream: int,
+    default_language: str,
+) -> list[dict[str, Any]]:
+    try:
+        if not tracks:
+            get_audio_stream(media, stream)
+            return [
+                {"stream": stream, "language": default_language, "label": ""}
+            ]
+
+        selected = parse_tracks(tracks, len(media["audio_streams"]))
+        if not selected:
+            raise Exception(f"[{media['path']}] does not contain audio")
+        return [
+            {
+                "stream": track_stream,
+                "language": get_track_language(
+                    get_audio_stream(media, track_stream),
+                    default_language,
+                    override,
+                ),
+                "label": get_track_label(
+                    track_stream, get_audio_stream(media, track_stream)
+                ),
+            }
+            for track_stream, override in selected
+        ]
+    except Exception as e:
+        raise zraise(e)
+
+
+def parse_tracks(
+    tracks: str, stream_count: int
+) -> list[tuple[int, Optional[str]]]:
+    # "all", or comma separated stream numbers with an optional language
+    # each, e.g. "0,2:de"
+    if tracks.strip().lower() == "all":
+        return [(stream, None) for stream in range(stream_count)]
+    selected = []
+    for part in tracks.split(","):
+        stream, _, language = part.strip().partition(":")
+        if not stream.isdigit():
+            raise Exception(f"Invalid audio track selection [{part}]")
+        if int(stream) not in [selection[0] for selection in selected]:
+            selected.append((int(stream), language.strip() or None))
+    return selected
@@ -1,15 +1,107 @@
-import srt
-import whisper_timestamped as whisper
+import os
+import threading
+import time
 
 
-from datetime import timedelta
+from collections import OrderedDict
+from typing import Any, Optional, TYPE_CHECKING, Union
 
+from core.audio import SAMPLE_RATE
 from core.logger import log
+from core.metrics import span
 from core.utils import (
     console_question as ask_q,
     yesno_popup_ask as ask_yn,
 )
-from core.zerr import zerr
+from core.writers import iter_transcription
+from core.zerr import zlog, zraise
+
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+MODEL_DTYPES = ("fp32", "fp16", "int8")
+TORCH_DTYPES = {"fp32": "float32", "fp16": "float16"}
+
+
+class ModelRegistry:
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.models: "OrderedDict[tuple[str, str, str], tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds: dict[str, float] = {}
+
+    def get(
+        self,
+        modelname: str,
+        device: Optional[str] = None,
+        dtype: Optional[str] = None,
+    ):
+        device = device or get_device()
+        key = (modelname, device, get_model_dtype(dtype, device))
+        with self.lock:
+            if key in self.models:
+                self.hits += 1
+                self.models.move_to_end(key)
+                return self.models[key][0]
+            self.misses += 1
+            load_start = time.perf_counter()
+            with span("model_load", model=":".join(key)):
+                model = load_model(*key)
+            self.load_seconds[":".join(key)] = (
+                time.perf_counter() - load_start
+            )
+            self.models[key] = (model, get_model_bytes(model))
+            self.evict(keep=key)
+            return model
+
+    def evict(self, keep: Optional[tuple[str, str, str]] = None) -> None:
+        max_bytes = self.max_bytes or get_model_memory_limit()
+        while len(self.models) > 1 and self.loaded_bytes() > max_bytes:
+            key = next(iter(self.models))
+            if key == keep:
+                break
+            del self.models[key]
+            self.evictions += 1
+            log(f"Evicted model [{':'.join(key)}]", success=True)
+
+    def loaded_bytes(self) -> int:
+        return sum(size for _, size in self.models.values())
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "loaded": [":".join(key) for key in self.models],
+                "loaded_bytes": self.loaded_bytes(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": dict(self.load_seconds),
+            }
+
+
+_dtype_fallbacks: set[tuple[str, str]] = set()
+_registry = ModelRegistry()
+
+
+def get_audio_duration(transcribedresults) -> float:
+    duration = transcribedresults.get("duration")
+    if duration is not None:
+        return float(duration)
+    segments = transcribedresults.get("segments") or []
+    return float(segments[-1]["end"]) if segments else 0.0
+
+
+def get_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
 
 
 def get_language(lang: str) -> str:
@@ -19,14 +111,13 @@ def get_language(lang: str) -> str:
             lang = "en"
         return lang
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
+        zlog(e)
         return "en"
 
 
 def get_transcription_type(type: int, gui: bool = False) -> int:
     try:
-        if type > 2 or type < 0 or type is None:
+        if type is None or type > 4 or type < 0:
             if gui:
                 output_format = ask_yn(
                     "Do you want the transcription in .srt format?"
@@ -66,54 +157,146 @@ def get_transcription_type(type: int, gui: bool = False) -> int:
 
         return type
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
+        zlog(e)
         return 1
 
 
+def get_model(
+    modelname: str, device: Optional[str] = None, dtype: Optional[str] = None
+):
+    return _registry.get(modelname, device, dtype)
+
+
+def get_model_bytes(model: Any) -> int:
+    return sum(
+        tensor.numel() * tensor.element_size()
+        for tensor in list(model.parameters()) + list(model.buffers())
+    )
+
+
+def get_model_dtype(
+    dtype: Optional[str] = None, device: Optional[str] = None
+) -> str:
+    dtype = dtype or os.environ.get("MODEL_DTYPE") or "fp32"
+    if dtype not in MODEL_DTYPES:
+        raise Exception(f"Unsupported model dtype: {dtype}")
+    if dtype == "fp32":
+        # valid on every device, so cache keys need not import torch
+        return dtype
+    device = device or get_device()
+    # fp16 kernels are GPU only and dynamic int8 quantization is CPU only;
+    # whisper would silently fall back to fp32 anyway
+    if (dtype == "fp16" and device == "cpu") or (
+        dtype == "int8" and device != "cpu"
+    ):
+        if (dtype, device) not in _dtype_fallbacks:
+            _dtype_fallbacks.add((dtype, device))
+            log(
+                f"Model dtype [{dtype}] is not supported on [{device}], "
+                "using [fp32]",
+                "WARNING",
+            )
+        return "fp32"
+    return dtype
+
+
+def get_model_memory_limit() -> int:
+    try:
+        return int(float(os.environ.get("MODEL_CACHE_MB", "4096")) * 1024**2)
+    except ValueError:
+        return 4096 * 1024**2
+
+
+def get_model_stats() -> dict[str, Any]:
+    return _registry.stats()
+
+
+def get_torch_threads() -> Optional[int]:
+    try:
+        threads = int(os.environ.get("TORCH_THREADS") or 0)
+    except ValueError:
+        return None
+    return threads if threads > 0 else None
+
+
+def get_transcription_types(
+    types: Union[int, list[int], None], gui: bool = False
+) -> list[int]:
+    if not isinstance(types, list):
+        types = [types]  # type: ignore[list-item]
+    transcription_types = []
+    for type in types:
+        transcription_type = get_transcription_type(type, gui)
+        if transcription_type not in transcription_types:
+            transcription_types.append(transcription_type)
+    return transcription_types
+
+
+def load_model(
+    modelname: str, device: Optional[str] = None, dtype: str = "fp32"
+):
+    try:
+        import torch
+        import whisper_timestamped as whisper
+
+        if dtype not in MODEL_DTYPES:
+            raise Exception(f"Unsupported model dtype: {dtype}")
+        threads = get_torch_threads()
+        if threads is not None:
+            torch.set_num_threads(threads)
+        model = whisper.load_model(modelname, device=device)
+        if dtype == "int8":
+            model = quantize_model(model)
+        elif dtype != "fp32":
+            model = model.to(getattr(torch, TORCH_DTYPES[dtype]))
+        log(
+            f"Whisper model [{modelname}] loaded on [{device}] as [{dtype}]",
+            success=True,
+        )
+        return model
+    except Exception as e:
+        raise zraise(e)
+
+
 def process_transcription(transcribedresults, type: int, lang: str):
     try:
-        if (
-            type == 0 or type == 1 or type == 2
-        ):  # 0 (text), 1 (text + time), 2 (.srt)
-            segments = []
-            for i, seg in enumerate(transcribedresults["segments"]):
-                start_time = timedelta(seconds=seg["start"])
-                end_time = timedelta(seconds=seg["end"])
-                content = seg["text"]
-                if lang != "en":
-                    # TODO: add support for translating to other languages
-                    pass  # remove when TODO is implemented
-                if type == 2:
-                    segments.append(
-                        srt.Subtitle(i, start_time, end_time, content)
-                    )
-                elif type == 1:
-                    segments.append(f"{start_time} - {end_time}: {content}")
-                elif type == 0:
-                    segments.append(content)
-                else:
-                    raise Exception(f"Unsupported output format: type[{type}]")
-            if type == 2:
-                return srt.compose(segments)
-            elif type == 0 or type == 1:
-                return "\n".join(segments)
-            else:
-                raise Exception(f"Unsupported output format: type[{type}]")
-        else:
-            raise Exception(f"Unsupported output format: type[{type}]")
+        return "".join(iter_transcription(transcribedresults, type, lang))
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
+
+
+def quantize_model(model: Any) -> Any:
+    import torch
 
+    # whisper's Linear subclass only adds a weight cast for fp16 inputs;
+    # quantize_dynamic matches exact types, so hand it plain nn.Linear
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
 
-def transcribe_audio(audiopath: str, modelname: str, lang: str):
+
+def transcribe_audio(
+    audio: Union["np.ndarray", str],
+    modelname: str,
+    lang: str,
+    model: Optional[Any] = None,
+):
     try:
-        audio = whisper.load_audio(audiopath)
-        model = whisper.load_model(modelname)
-        return whisper.transcribe(model, audio, language=lang)
+        import whisper_timestamped as whisper
+
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        device = get_device()
+        dtype = get_model_dtype(device=device)
+        if model is None:
+            model = get_model(modelname, device, dtype)
+        result = whisper.transcribe(
+            model, audio, language=lang, fp16=dtype == "fp16"
+        )
+        result["duration"] = len(audio) / SAMPLE_RATE
+        return result
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
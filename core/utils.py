@@ -1,39 +1,16 @@
 import os
-import pickle
 import platform
-import requests
 import shutil
 import tempfile
 
 
 from datetime import datetime
 from os import path
-from tkinter import filedialog, messagebox, Tk
 from typing import Iterable, Optional, Union
 
 
 from core.logger import log
-from core.zerr import zerr
-
-
-def cache_loader(filepath: str) -> None:
-    try:
-        with open(filepath, "rb") as f:
-            return pickle.load(f)
-    except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
-
-
-def cache_saver(filepath: str, data: object) -> None:
-    try:
-        with open(filepath, "wb") as f:
-            pickle.dump(data, f)
-    except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+from core.zerr import zerr, zlog, zraise
 
 
 def console_question(
@@ -45,9 +22,7 @@ def console_question(
         else:
             return str(input(f"{question}: "))
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def download_latest_ffmpeg(operating_system: Optional[str] = None) -> bool:
@@ -72,6 +47,8 @@ def download_latest_ffmpeg(operating_system: Optional[str] = None) -> bool:
         if not os.path.exists(ffmpeg_dir):
             os.makedirs(ffmpeg_dir)
 
+        import requests
+
         response = requests.get(download_url, timeout=10)
         response.raise_for_status()
 
@@ -96,9 +73,7 @@ def download_latest_ffmpeg(operating_system: Optional[str] = None) -> bool:
 
         return True
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def file_dialog_ask(
@@ -109,6 +84,8 @@ def file_dialog_ask(
     initdir: Optional[str] = None,
 ) -> str:
     try:
+        from tkinter import filedialog
+
         if type == "open":
             if initdir is not None:
                 return filedialog.askopenfilename(
@@ -126,95 +103,78 @@ def file_dialog_ask(
         else:
             raise Exception(f"Unsupported file dialog type: {type}")
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def file_timestamp() -> str:
     return datetime.now().strftime("%Y%m%d-%H%M%S")
 
 
-def get_extension(type: int = 0, options: list[str] = [".srt", ".txt"]) -> str:
+def get_extension(
+    type: int = 0, options: list[str] = [".srt", ".txt", ".vtt", ".json"]
+) -> str:
     try:
         if type == 0 or type == 1:
             return options[1]
         elif type == 2:
             return options[0]
+        elif type == 3:
+            return options[2]
+        elif type == 4:
+            return options[3]
         else:
             raise Exception(f"Unsupported extension type: {type}")
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
-
-
-def get_file_type_dict() -> dict[str, list[str]]:
-    return {
-        "ffmpeg_a": get_file_types("ffmpeg", "audio"),
-        "ffmpeg_v": get_file_types("ffmpeg", "video"),
-        "moviepy": get_file_types("moviepy", "video"),
-        "whisper": get_file_types("whisper", "audio"),
-    }
-
-
-def get_file_types(app: str, type: str) -> list[str]:
+        raise zraise(e)
+
+
+def get_ffmpeg_audio_args(
+    filepath: str, stream: int = 0, sample_rate: int = 16000
+) -> list[str]:
+    # only the selected audio stream is mapped, so ffmpeg demuxes the
+    # container without ever decoding or encoding video frames
+    return [
+        get_ffmpeg_path(),
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        filepath,
+    ] + get_ffmpeg_stream_args(stream, sample_rate)
+
+
+def get_ffmpeg_path(binary: str = "ffmpeg") -> str:
     try:
-        if app == "ffmpeg":
-            if type == "audio":
-                return (
-                    str(
-                        os.environ.get(
-                            "FFMPEG_AUDIO_TYPES", "*.mp3,*.ogg,*.wav"
-                        )
-                    )
-                ).split(",")
-            elif type == "video":
-                return (
-                    str(
-                        os.environ.get(
-                            "FFMPEG_VIDEO_TYPES", "*.mp4,*.mkv,*.avi"
-                        )
-                    )
-                ).split(",")
-            elif type is None or type == "":
-                raise Exception(f"No file type specified for {app}")
-            else:
-                raise Exception(f"Unsupported file type for {app}: {type}")
-        elif app == "whisper":
-            if type == "audio":
-                return (
-                    str(
-                        os.environ.get(
-                            "WHISPER_AUDIO_TYPES", "*.mp3,*.ogg,*.wav"
-                        )
-                    )
-                ).split(",")
-            elif type is None or type == "":
-                raise Exception(f"No file type specified for {app}")
-            else:
-                raise Exception(f"Unsupported file type for {app}: {type}")
-        elif app == "moviepy":
-            if type == "video":
-                return (
-                    str(
-                        os.environ.get(
-                            "MOVIEPY_VIDEO_TYPES", "*.mp4,*.mkv,*.avi"
-                        )
-                    )
-                ).split(",")
-            elif type is None or type == "":
-                raise Exception(f"No file type specified for {app}")
-            else:
-                raise Exception(f"Unsupported file type for {app}: {type}")
-        elif app is None or app == "":
-            raise Exception("No app specified")
-        else:
-            raise Exception(f"Unsupported app: {app}")
+        binary_path = shutil.which(binary)
+        if binary_path is None:
+            ffmpeg_dir = os.environ.get("FFMPEG_DIR", "./ffmpeg")
+            binary_path = shutil.which(
+                binary, path=os.path.abspath(ffmpeg_dir)
+            )
+        if binary_path is None:
+            raise Exception(f"Could not find [{binary}] on PATH")
+        return binary_path
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
+
+
+def get_ffmpeg_stream_args(
+    stream: int = 0, sample_rate: int = 16000
+) -> list[str]:
+    # output options apply to the output that follows them, so repeating
+    # these per output lets one ffmpeg run write several streams
+    return [
+        "-map",
+        f"0:a:{stream}",
+        "-vn",
+        "-sn",
+        "-dn",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+    ]
 
 
 def get_internal_directory_path(
@@ -236,9 +196,7 @@ def get_internal_directory_path(
             )
         return directory_path
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def get_os() -> str:
@@ -259,15 +217,15 @@ def get_sys_temp_dir() -> str:
                 f"System temp directory [{sys_temp_dir}] is not writable"
             )
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def gui_mode() -> bool:
     if get_os() == "Linux" and os.environ.get("DISPLAY", "") == "":
         return False
     else:
+        from tkinter import Tk
+
         root = Tk()
         root.withdraw()
         return True
@@ -275,6 +233,8 @@ def gui_mode() -> bool:
 
 def msgbox(type: str = "info", msg: Optional[str] = None) -> None:
     try:
+        from tkinter import messagebox
+
         if type.lower() == "info":
             messagebox.showinfo("TranscriptGen", msg if msg else "Success")
         elif type.lower() == "warning":
@@ -285,9 +245,7 @@ def msgbox(type: str = "info", msg: Optional[str] = None) -> None:
             raise Exception(f"Unsupported message box type: {type}")
         return
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
-        raise Exception(error_info)
+        raise zraise(e)
 
 
 def notification(
@@ -325,9 +283,7 @@ def scratch_path() -> str:
             )
             return sys_temp_dir
         except Exception as e:
-            error_info = zerr(e)
-            log(error_info, "ERROR")
-            raise Exception(error_info)
+            raise zraise(e)
 
 
 def verbose_mode(verbargument: Optional[int]) -> bool:
@@ -341,18 +297,18 @@ def verbose_mode(verbargument: Optional[int]) -> bool:
         else:
             return False
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "INFO")
+        zlog(e, "INFO")
         return False
 
 
 def yesno_popup_ask(question: str) -> bool:
     try:
+        from tkinter import messagebox
+
         response = messagebox.askyesno("TranscriptGen", question)
         if response is None or response == "":
             return False
         return response
     except Exception as e:
-        error_info = zerr(e)
-        log(error_info, "ERROR")
+        zlog(e)
         return False
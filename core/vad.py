@@ -0,0 +1,138 @@
+import bisect
+
+
+from typing import Any, TYPE_CHECKING
+
+
+from core.audio import SAMPLE_RATE
+from core.logger import log
+from core.zerr import zraise
+
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+FRAME_SECONDS = 0.03
+MIN_SILENCE_SECONDS = 0.5
+MIN_SPEECH_SECONDS = 0.25
+NOISE_FLOOR_MAX_DB = -45.0
+NOISE_MARGIN_DB = 10.0
+PADDING_SECONDS = 0.2
+SILENCE_FLOOR_DB = -50.0
+
+
+def detect_speech(audio: "np.ndarray") -> list[tuple[int, int]]:
+    try:
+        import numpy as np
+
+        frame_size = int(SAMPLE_RATE * FRAME_SECONDS)
+        frame_count = len(audio) // frame_size
+        if frame_count == 0:
+            return [(0, len(audio))] if len(audio) > 0 else []
+
+        frames = audio[: frame_count * frame_size].reshape(
+            frame_count, frame_size
+        )
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        energy_db = 20 * np.log10(np.maximum(rms, 1e-10))
+        # the quietest frames are only a noise floor when they are quiet in
+        # absolute terms; a recording without pauses is kept whole rather
+        # than losing its quieter half
+        noise_floor = float(np.percentile(energy_db, 10))
+        if noise_floor > NOISE_FLOOR_MAX_DB:
+            return [(0, len(audio))]
+        # the threshold follows the recording's own noise floor, but never
+        # drops below digital silence
+        threshold = max(noise_floor + NOISE_MARGIN_DB, SILENCE_FLOOR_DB)
+        speech = energy_db > threshold
+
+        regions = []
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], speech, [0]))))
+        for start, end in zip(edges[::2], edges[1::2]):
+            if regions and start - regions[-1][1] < to_frames(
+                MIN_SILENCE_SECONDS
+            ):
+                regions[-1] = (regions[-1][0], int(end))
+            else:
+                regions.append((int(start), int(end)))
+
+        padding = to_frames(PADDING_SECONDS)
+        speech_regions: list[tuple[int, int]] = []
+        for start, end in regions:
+            if end - start < to_frames(MIN_SPEECH_SECONDS):
+                continue
+            start = max(start - padding, 0) * frame_size
+            end = min((end + padding) * frame_size, len(audio))
+            if speech_regions and start <= speech_regions[-1][1]:
+                speech_regions[-1] = (speech_regions[-1][0], end)
+            else:
+                speech_regions.append((start, end))
+        return speech_regions
+    except Exception as e:
+        raise zraise(e)
+
+
+def remove_silence(
+    audio: "np.ndarray",
+) -> tuple["np.ndarray", list[tuple[float, float]]]:
+    try:
+        import numpy as np
+
+        regions = detect_speech(audio)
+        # time map entries are (start in speech-only audio, start in the
+        # original audio) for each kept region, both in seconds
+        time_map = []
+        kept = 0
+        for start, end in regions:
+            time_map.append((kept / SAMPLE_RATE, start / SAMPLE_RATE))
+            kept += end - start
+        speech_audio = (
+            np.concatenate([audio[start:end] for start, end in regions])
+            if regions
+            else audio[:0]
+        )
+
+        skipped = 1 - len(speech_audio) / len(audio) if len(audio) else 0.0
+        log(
+            f"VAD kept {len(speech_audio) / SAMPLE_RATE:.1f}s of "
+            f"{len(audio) / SAMPLE_RATE:.1f}s ({skipped:.0%} skipped)",
+            success=True,
+        )
+        return speech_audio, time_map
+    except Exception as e:
+        raise zraise(e)
+
+
+def restore_time(
+    seconds: float,
+    time_map: list[tuple[float, float]],
+    speech_starts: list[float],
+    end: bool = False,
+) -> float:
+    if not time_map:
+        return seconds
+    # an end time exactly on a splice belongs to the region before it
+    bisect_time = bisect.bisect_left if end else bisect.bisect_right
+    index = max(bisect_time(speech_starts, seconds) - 1, 0)
+    speech_start, original_start = time_map[index]
+    return original_start + (seconds - speech_start)
+
+
+def restore_timestamps(
+    result: dict[str, Any], time_map: list[tuple[float, float]]
+) -> dict[str, Any]:
+    speech_starts = [speech_start for speech_start, _ in time_map]
+    for segment in result["segments"]:
+        for item in [segment] + list(segment.get("words") or []):
+            item["start"] = restore_time(
+                item["start"], time_map, speech_starts
+            )
+            item["end"] = restore_time(
+                item["end"], time_map, speech_starts, end=True
+            )
+    return result
+
+
+def to_frames(seconds: float) -> int:
+    return max(1, int(round(seconds / FRAME_SECONDS)))
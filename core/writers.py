@@ -0,0 +1,135 @@
+import json
+
+
+from datetime import timedelta
+from typing import Any, Iterable, Iterator, TextIO
+
+
+from core.zerr import zraise
+
+
+OUTPUT_TYPES = {
+    0: "transcript only",
+    1: "transcript with time",
+    2: ".srt file",
+    3: ".vtt file",
+    4: ".json file with word timings",
+}
+
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return (
+        f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}"
+        f"{milliseconds:03d}"
+    )
+
+
+def get_confidence(item: dict[str, Any]):
+    confidence = item.get("confidence")
+    # NaN marks a missing confidence in stored results and is not valid JSON
+    if confidence is None or confidence != confidence:
+        return None
+    return confidence
+
+
+def iter_json(segments: Iterable[dict[str, Any]], result: dict[str, Any]):
+    yield (
+        "{"
+        f'"language": {json.dumps(result.get("language"))}, '
+        f'"duration": {json.dumps(result.get("duration"))}, '
+        '"segments": ['
+    )
+    for index, seg in enumerate(segments):
+        yield ("" if index == 0 else ",") + "\n" + json.dumps(
+            {
+                "id": index,
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"],
+                "confidence": get_confidence(seg),
+                "words": [
+                    {
+                        "text": word["text"],
+                        "start": word["start"],
+                        "end": word["end"],
+                        "confidence": get_confidence(word),
+                    }
+                    for word in seg.get("words") or []
+                ],
+            },
+            ensure_ascii=False,
+        )
+    yield "\n]}\n"
+
+
+def iter_srt(segments: Iterable[dict[str, Any]]) -> Iterator[str]:
+    import srt
+
+    index = 1
+    for seg in segments:
+        start_time = timedelta(seconds=seg["start"])
+        end_time = timedelta(seconds=seg["end"])
+        # srt.compose drops the same subtitles when it reindexes
+        if not seg["text"].strip() or start_time >= end_time:
+            continue
+        yield srt.Subtitle(index, start_time, end_time, seg["text"]).to_srt()
+        index += 1
+
+
+def iter_text(
+    segments: Iterable[dict[str, Any]], timed: bool = False
+) -> Iterator[str]:
+    for index, seg in enumerate(segments):
+        content = seg["text"]
+        if timed:
+            start_time = timedelta(seconds=seg["start"])
+            end_time = timedelta(seconds=seg["end"])
+            content = f"{start_time} - {end_time}: {content}"
+        yield content if index == 0 else f"\n{content}"
+
+
+def iter_transcription(
+    transcribedresults: dict[str, Any], type: int, lang: str
+) -> Iterator[str]:
+    segments = transcribedresults["segments"]
+    if lang != "en":
+        # TODO: add support for translating to other languages
+        pass  # remove when TODO is implemented
+    if type == 0 or type == 1:
+        return iter_text(segments, timed=type == 1)
+    elif type == 2:
+        return iter_srt(segments)
+    elif type == 3:
+        return iter_vtt(segments)
+    elif type == 4:
+        return iter_json(segments, transcribedresults)
+    else:
+        raise Exception(f"Unsupported output format: type[{type}]")
+
+
+def iter_vtt(segments: Iterable[dict[str, Any]]) -> Iterator[str]:
+    yield "WEBVTT\n"
+    for seg in segments:
+        if not seg["text"].strip() or seg["start"] >= seg["end"]:
+            continue
+        yield (
+            f"\n{format_timestamp(seg['start'], '.')} --> "
+            f"{format_timestamp(seg['end'], '.')}\n"
+            f"{seg['text'].strip()}\n"
+        )
+
+
+def write_stream(chunks: Iterable[str], target: TextIO) -> int:
+    try:
+        written = 0
+        for chunk in chunks:
+            target.write(chunk)
+            written += len(chunk)
+        target.flush()
+        return written
+    except Exception as e:
+        raise zraise(e)
@@ -1,27 +1,122 @@
-import inspect
+import reprlib
+import sys
 import traceback
 from types import FrameType
+from typing import Any, Optional
 
 
-def zerr(e: Exception) -> str:
-    return_stmt = str(e)
-    current_frame = inspect.currentframe()
-    if isinstance(current_frame, FrameType):
-        error_frame = current_frame.f_back
-        if isinstance(error_frame, FrameType):
-            error_line = error_frame.f_lineno
-            function_name = error_frame.f_code.co_name
-            arg_info = inspect.getargvalues(error_frame)
-            function_args_str = ", ".join(
-                f"{arg}={error_frame.f_locals[arg]}" for arg in arg_info.args
-            )
+MAX_ARG_REPR = 120
+
+_repr = reprlib.Repr()
+_repr.maxstring = MAX_ARG_REPR
+_repr.maxother = MAX_ARG_REPR
+_repr.maxlist = _repr.maxtuple = _repr.maxdict = _repr.maxset = 8
+_repr.maxlevel = 2
 
-            tb = traceback.extract_tb(e.__traceback__)
 
-            filename, line_no, function_name, line = tb[-1]
-            return_stmt = (
-                f"[{filename}:{line_no}]|"
-                f"[{function_name}({function_args_str}):{error_line}]|"
-                f"[{line}]|[error:{e}]"
+class ZError(Exception):
+    def __init__(self, error: BaseException, frame: Optional[FrameType]):
+        super().__init__(str(error))
+        self.error = error
+        self.logged = False
+        self._message: Optional[str] = None
+        self.error_line = None
+        self.function_args = ""
+        if frame is not None:
+            # only bounded argument reprs are kept, never the values, so a
+            # failing call does not pin large audio arrays or results
+            code = frame.f_code
+            arg_count = (
+                code.co_argcount
+                + code.co_kwonlyargcount
+                + bool(code.co_flags & 0x04)  # *args
+                + bool(code.co_flags & 0x08)  # **kwargs
+            )
+            self.error_line = frame.f_lineno
+            self.function_args = ", ".join(
+                f"{arg}={short_repr(frame.f_locals[arg])}"
+                for arg in code.co_varnames[:arg_count]
+                if arg in frame.f_locals
             )
-    return return_stmt
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # worker processes send errors back pickled; the wrapped exception
+        # and its traceback may not pickle, so the formatted message does
+        return (
+            restore_error,
+            (str(self), self.error_line, self.function_args, self.logged),
+        )
+
+    def __str__(self) -> str:
+        if self._message is None:
+            self._message = format_error(self)
+        return self._message
+
+
+def capture(e: BaseException, frame: Optional[FrameType]) -> ZError:
+    if isinstance(e, ZError):
+        return e
+    error = ZError(e, frame)
+    error.__cause__ = e
+    return error
+
+
+def format_error(error: ZError) -> str:
+    tb = traceback.extract_tb(error.error.__traceback__)
+    if len(tb) == 0:
+        return str(error.error)
+    filename, line_no, function_name, line = tb[-1]
+    return (
+        f"[{filename}:{line_no}]|"
+        f"[{function_name}({error.function_args}):{error.error_line}]|"
+        f"[{line}]|[error:{error.error}]"
+    )
+
+
+def log_once(error: ZError, level: str = "ERROR") -> None:
+    from core.logger import log
+
+    # an error is logged where it is first caught, not again by every
+    # caller it passes through on the way up
+    if not error.logged:
+        error.logged = True
+        log(str(error), level)
+
+
+def restore_error(
+    message: str,
+    error_line: Optional[int],
+    function_args: str,
+    logged: bool,
+) -> ZError:
+    error = ZError(Exception(message), None)
+    error._message = message
+    error.error_line = error_line
+    error.function_args = function_args
+    error.logged = logged
+    return error
+
+
+def short_repr(value: Any) -> str:
+    if hasattr(value, "shape") and hasattr(value, "dtype"):
+        return f"<{type(value).__name__} shape={value.shape} {value.dtype}>"
+    try:
+        return _repr.repr(value)
+    except Exception:
+        return f"<{type(value).__name__}>"
+
+
+def zerr(e: BaseException) -> str:
+    return str(capture(e, sys._getframe(1)))
+
+
+def zlog(e: BaseException, level: str = "ERROR") -> str:
+    error = capture(e, sys._getframe(1))
+    log_once(error, level)
+    return str(error)
+
+
+def zraise(e: BaseException) -> ZError:
+    error = capture(e, sys._getframe(1))
+    log_once(error)
+    return error
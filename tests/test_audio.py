@@ -0,0 +1,46 @@
+import sys
+
+
+import numpy as np
+import pytest
+
+
+import core.audio
+from core.audio import decode_audio, SAMPLE_RATE
+
+
+# writes the PCM in odd-sized pieces, like a pipe may deliver it
+FAKE_FFMPEG = """
+import sys
+pcm = open(sys.argv[1], "rb").read()
+for start in range(0, len(pcm), 999):
+    sys.stdout.buffer.write(pcm[start : start + 999])
+    sys.stdout.buffer.flush()
+"""
+
+
+@pytest.mark.parametrize("probed_seconds", [0.0, 1.0, 3.0, 30.0])
+def test_decode_audio(tmp_path, monkeypatch, probed_seconds):
+    generator = np.random.default_rng(0)
+    pcm = generator.integers(
+        -32768, 32767, 3 * SAMPLE_RATE + 7, dtype=np.int16
+    )
+    pcm_path = tmp_path / "audio.pcm"
+    pcm.tofile(pcm_path)
+    monkeypatch.setattr(
+        core.audio,
+        "get_ffmpeg_audio_args",
+        lambda filepath, stream, sample_rate: [
+            sys.executable,
+            "-c",
+            FAKE_FFMPEG,
+            str(pcm_path),
+        ],
+    )
+    monkeypatch.setattr(
+        core.audio, "get_media_duration", lambda filepath: probed_seconds
+    )
+    # the fake ignores the trailing ffmpeg output arguments
+    audio = decode_audio(str(pcm_path))
+    assert audio.dtype == np.float32
+    np.testing.assert_array_equal(audio, pcm.astype(np.float32) / 32768.0)
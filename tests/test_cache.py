@@ -0,0 +1,104 @@
+import os
+
+
+from argparse import Namespace
+
+
+import core.app
+import core.cache
+import core.server
+from core.cache import (
+    add_cache_bytes,
+    CACHE_EXTENSION,
+    evict_cache,
+    PROBE_DIR,
+    scan_cache,
+)
+
+
+def write_entry(path, size: int, mtime: int) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_probe_files_are_evicted_with_results(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    old_probe = write_entry(tmp_path / PROBE_DIR / "ab" / "ab1.json", 100, 1)
+    old_result = write_entry(tmp_path / "cd" / f"cd1{CACHE_EXTENSION}", 100, 2)
+    new_probe = write_entry(tmp_path / PROBE_DIR / "ef" / "ef1.json", 100, 3)
+    new_result = write_entry(tmp_path / "ef" / f"ef2{CACHE_EXTENSION}", 100, 4)
+    other = write_entry(tmp_path / "checkpoints" / "key" / "a.json", 500, 0)
+
+    assert evict_cache(250) == 2
+    assert not os.path.exists(old_probe)
+    assert not os.path.exists(old_result)
+    for kept in (new_probe, new_result, other):
+        assert os.path.exists(kept)
+
+
+def test_cli_and_server_share_cache_keys(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path / "cache"))
+    media = tmp_path / "talk.wav"
+    media.write_bytes(b"RIFF" + b"\0" * 64)
+    result = {"text": "", "segments": [], "language": "en", "duration": 1.0}
+    keys = []
+
+    def lookup(key):
+        keys.append(key)
+        return result
+
+    monkeypatch.setattr(
+        core.app,
+        "probe_media",
+        lambda filepath: {"path": filepath, "audio_streams": [{}]},
+    )
+    monkeypatch.setattr(core.app, "cache_lookup", lookup)
+    monkeypatch.setattr(core.app, "write_outputs", lambda *args: [])
+    monkeypatch.setattr(core.server, "cache_lookup", lookup)
+
+    core.app.process_file(
+        str(media),
+        Namespace(model="tiny", language="en", type=[2], chunk=0, vad=False),
+    )
+    core.server.run_job(
+        {
+            "id": "job",
+            "file": str(media),
+            "model": "tiny",
+            "language": "en",
+            "stream": 0,
+            "upload": False,
+        }
+    )
+    assert len(keys) == 2
+    assert keys[0] == keys[1]
+
+
+def test_cache_is_only_walked_over_the_limit(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("CACHE_MAX_MB", str(1000 / 1024**2))
+    monkeypatch.setattr(core.cache, "_cache_bytes", None)
+    walks = []
+
+    def counted_scan():
+        walks.append(1)
+        return scan_cache()
+
+    monkeypatch.setattr(core.cache, "scan_cache", counted_scan)
+    for index in range(9):
+        write_entry(tmp_path / PROBE_DIR / "ab" / f"{index}.json", 100, index)
+        add_cache_bytes(100)
+    assert len(walks) == 1  # seeding the total
+    assert core.cache._cache_bytes == 900
+
+    write_entry(tmp_path / PROBE_DIR / "ab" / "9.json", 200, 9)
+    add_cache_bytes(200)
+    assert len(walks) == 2
+    # evicted below the limit, so the next write does not walk again
+    assert core.cache._cache_bytes <= 900
+    write_entry(tmp_path / PROBE_DIR / "ab" / "10.json", 50, 10)
+    add_cache_bytes(50)
+    assert len(walks) == 2
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+
+import core.chunking
+from core.audio import SAMPLE_RATE
+from core.chunking import (
+    find_split_points,
+    MIN_CHUNK_SECONDS,
+    transcribe_chunked,
+    transcribe_tracks,
+)
+
+
+def noise(seconds: float, seed: int = 0) -> np.ndarray:
+    generator = np.random.default_rng(seed)
+    return generator.uniform(-0.5, 0.5, int(seconds * SAMPLE_RATE)).astype(
+        np.float32
+    )
+
+
+@pytest.mark.parametrize("chunk_seconds", [2, 3, 4, 5, 5.5, 8, 30])
+def test_split_points_advance(chunk_seconds):
+    audio = noise(60)
+    split_points = find_split_points(audio, chunk_seconds)
+    assert split_points[0] == 0
+    assert split_points[-1] == len(audio)
+    assert all(a < b for a, b in zip(split_points, split_points[1:]))
+    # every chunk stays within half a chunk of the requested length
+    for start, end in zip(split_points[1:-2], split_points[2:-1]):
+        assert end - start <= 1.5 * chunk_seconds * SAMPLE_RATE
+
+
+def test_split_at_silence():
+    audio = noise(60)
+    silence = slice(28 * SAMPLE_RATE, int(28.5 * SAMPLE_RATE))
+    audio[silence] = 0.0
+    split_points = find_split_points(audio, 30)
+    assert silence.start <= split_points[1] < silence.stop
+
+
+def test_short_audio_is_one_chunk():
+    audio = noise(10)
+    assert find_split_points(audio, 30) == [0, len(audio)]
+
+
+@pytest.mark.parametrize("chunk_seconds", [0.5, 1, MIN_CHUNK_SECONDS - 0.1])
+def test_short_chunks_are_rejected(chunk_seconds):
+    with pytest.raises(Exception):
+        find_split_points(noise(60), chunk_seconds)
+
+
+def test_given_model_runs_chunks_in_process(monkeypatch):
+    model = object()
+    calls = []
+
+    def fake_transcribe_chunk(audio, modelname, lang, offset, model=None):
+        calls.append(model)
+        return {
+            "segments": [
+                {
+                    "start": offset,
+                    "end": offset + len(audio) / SAMPLE_RATE,
+                    "text": "x",
+                }
+            ],
+            "language": lang,
+        }
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a worker pool was started")
+
+    monkeypatch.setattr(
+        core.chunking, "transcribe_chunk", fake_transcribe_chunk
+    )
+    monkeypatch.setattr(core.chunking, "ProcessPoolExecutor", no_pool)
+    transcribe_chunked(noise(60), "tiny", "en", 10, workers=2, model=model)
+    transcribe_tracks(
+        [noise(5), noise(5, seed=1)], "tiny", ["en", "de"], 2, model=model
+    )
+    assert len(calls) > 2
+    assert all(call is model for call in calls)
@@ -0,0 +1,98 @@
+import os
+
+
+from argparse import Namespace
+
+
+from core.index import (
+    filter_changed,
+    get_index_options,
+    open_index,
+    record_file,
+)
+
+
+def make_args(**overrides) -> Namespace:
+    options = {
+        "chunk": 0,
+        "outputfolder": None,
+        "stream": 0,
+        "tracks": None,
+        "type": [2],
+        "vad": False,
+    }
+    options.update(overrides)
+    return Namespace(**options)
+
+
+def make_entry(file_path: str) -> tuple[str, int, int]:
+    file_stat = os.stat(file_path)
+    return (file_path, file_stat.st_size, file_stat.st_mtime_ns)
+
+
+def record(connection, tmp_path, args) -> tuple[str, int, int]:
+    media = tmp_path / "talk.wav"
+    media.write_bytes(b"RIFF" + b"\0" * 64)
+    output = tmp_path / "talk.wav.srt"
+    output.write_text("1\n")
+    record_file(
+        connection,
+        {"file": str(media), "outputs": [str(output)]},
+        "base",
+        "en",
+        get_index_options(args),
+    )
+    return make_entry(str(media))
+
+
+def test_unchanged_file_is_skipped(tmp_path):
+    connection = open_index(str(tmp_path / "index.sqlite"))
+    args = make_args()
+    entry = record(connection, tmp_path, args)
+    assert (
+        filter_changed(
+            connection, [entry], "base", "en", get_index_options(args)
+        )
+        == []
+    )
+
+
+def test_changed_options_are_queued(tmp_path):
+    connection = open_index(str(tmp_path / "index.sqlite"))
+    entry = record(connection, tmp_path, make_args())
+    for args in (
+        make_args(type=[3]),
+        make_args(outputfolder=str(tmp_path / "out")),
+        make_args(tracks="all"),
+        make_args(chunk=30),
+        make_args(vad=True),
+    ):
+        assert filter_changed(
+            connection, [entry], "base", "en", get_index_options(args)
+        ) == [entry]
+
+
+def test_touched_file_with_same_content_is_skipped(tmp_path):
+    connection = open_index(str(tmp_path / "index.sqlite"))
+    args = make_args()
+    entry = record(connection, tmp_path, args)
+    os.utime(entry[0], ns=(entry[2] + 10**9, entry[2] + 10**9))
+    touched = make_entry(entry[0])
+    assert (
+        filter_changed(
+            connection, [touched], "base", "en", get_index_options(args)
+        )
+        == []
+    )
+    (mtime_ns,) = connection.execute(
+        "SELECT mtime_ns FROM files WHERE path = ?", (entry[0],)
+    ).fetchone()
+    assert mtime_ns == touched[2]
+
+    with open(entry[0], "r+b") as f:
+        f.write(b"RIFX")
+    os.utime(entry[0], ns=(entry[2] + 2 * 10**9, entry[2] + 2 * 10**9))
+    edited = make_entry(entry[0])
+    assert filter_changed(
+        connection, [edited], "base", "en", get_index_options(args)
+    ) == [edited]
@@ -0,0 +1,39 @@
+import core.server
+from core.metrics import format_prometheus, format_prometheus_totals
+
+
+def make_job(job_id: str) -> dict:
+    return {
+        "id": job_id,
+        "file": f"{job_id}.wav",
+        "model": "tiny",
+        "language": "en",
+        "stream": 0,
+        "upload": False,
+    }
+
+
+def test_totals_match_reports():
+    reports = [
+        {"spans": [{"stage": "decode", "seconds": 1.5, "read_bytes": 10}]},
+        {"spans": [{"stage": "decode", "seconds": 0.5, "read_bytes": 5}]},
+    ]
+    text = format_prometheus(reports)
+    assert "transcriptgen_jobs_total 2" in text
+    assert 'transcriptgen_stage_seconds_total{stage="decode"} 2.0' in text
+    assert 'transcriptgen_stage_read_bytes_total{stage="decode"} 15' in text
+
+
+def test_server_counters_survive_pruning(monkeypatch):
+    monkeypatch.setattr(core.server, "_metrics_totals", {})
+    monkeypatch.setattr(core.server, "get_cache_key", lambda *args: "key")
+    monkeypatch.setattr(
+        core.server, "cache_lookup", lambda key: {"segments": []}
+    )
+    for job_id in ("first", "second"):
+        core.server.run_job(make_job(job_id))
+    with core.server._jobs_lock:
+        core.server._jobs.clear()
+    text = format_prometheus_totals(core.server._metrics_totals)
+    assert "transcriptgen_jobs_total 2" in text
+    assert 'transcriptgen_stage_calls_total{stage="cache_lookup"} 2' in text
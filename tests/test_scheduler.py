@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+
+
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+
+
+import core.app
+import core.scheduler
+from core.scheduler import schedule_files
+
+
+def fake_run_job(file_path: str, args: Namespace) -> dict:
+    if "crash" in file_path:
+        os._exit(1)
+    return {
+        "file": file_path,
+        "pid": os.getpid(),
+        "model_seconds": 0.0,
+        "busy_seconds": 0.0,
+        "stats": {"file": file_path},
+        "error": None,
+    }
+
+
+def fake_worker_pool(
+    workers: int, modelname: str, threads: int
+) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def test_killed_worker_fails_only_its_file(monkeypatch):
+    file_paths = ["a.wav", "crash.wav", "b.wav", "c.wav"]
+    monkeypatch.setattr(core.scheduler, "run_job", fake_run_job)
+    monkeypatch.setattr(core.scheduler, "get_worker_pool", fake_worker_pool)
+    monkeypatch.setattr(
+        core.scheduler,
+        "get_durations",
+        lambda file_paths: {
+            file_path: float(index)
+            for index, file_path in enumerate(file_paths)
+        },
+    )
+    recorded = []
+    scheduled = schedule_files(
+        file_paths,
+        Namespace(model="tiny"),
+        2,
+        threads=1,
+        on_complete=recorded.append,
+    )
+    assert scheduled["failed"] == ["crash.wav"]
+    assert sorted(stats["file"] for stats in scheduled["completed"]) == [
+        "a.wav",
+        "b.wav",
+        "c.wav",
+    ]
+    assert len(recorded) == 3
+
+
+def test_scheduled_job_runs_chunks_in_process(monkeypatch):
+    model = object()
+    calls = []
+    monkeypatch.setattr(core.scheduler, "_worker_model", model)
+    monkeypatch.setattr(
+        core.app,
+        "process_file",
+        lambda file_path, args, model=None: calls.append((args, model)),
+    )
+    args = Namespace(model="tiny", chunk=30, chunk_workers=4)
+    job = core.scheduler.run_job("a.wav", args)
+    assert job["error"] is None
+    assert len(calls) == 1
+    job_args, job_model = calls[0]
+    assert job_args.chunk_workers == 1
+    assert job_model is model
+    assert args.chunk_workers == 4
@@ -0,0 +1,53 @@
+import threading
+import urllib.error
+import urllib.request
+
+
+import pytest
+
+
+import core.server
+from core.server import ThreadingHTTPServer, TranscriptionHandler
+
+
+@pytest.fixture
+def server_url(monkeypatch):
+    monkeypatch.setitem(
+        core.server._jobs,
+        "done",
+        {
+            "id": "done",
+            "file": "talk.wav",
+            "language": "en",
+            "status": "done",
+            "result": {
+                "text": " Hello.",
+                "segments": [{"start": 0.0, "end": 1.0, "text": " Hello."}],
+            },
+        },
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TranscriptionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get_status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+@pytest.mark.parametrize("requested_type", ["srt", "9", "-1", "2.0"])
+def test_unsupported_type_is_a_client_error(server_url, requested_type):
+    url = f"{server_url}/jobs/done/result?type={requested_type}"
+    assert get_status(url) == 400
+
+
+def test_supported_type_is_sent(server_url):
+    assert get_status(f"{server_url}/jobs/done/result?type=0") == 200
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+
+from core.audio import SAMPLE_RATE
+from core.vad import detect_speech, restore_timestamps
+
+
+def noise(seconds: float, level_db: float, seed: int = 0) -> np.ndarray:
+    generator = np.random.default_rng(seed)
+    amplitude = 10 ** (level_db / 20) * np.sqrt(3)
+    return generator.uniform(
+        -amplitude, amplitude, int(seconds * SAMPLE_RATE)
+    ).astype(np.float32)
+
+
+def test_quiet_half_without_silence_is_kept():
+    audio = np.concatenate([noise(30, -10), noise(30, -30, seed=1)])
+    assert detect_speech(audio) == [(0, len(audio))]
+
+
+def test_silence_is_removed():
+    audio = np.concatenate(
+        [noise(10, -20), noise(5, -70, seed=1), noise(10, -20, seed=2)]
+    )
+    regions = detect_speech(audio)
+    assert len(regions) == 2
+    assert regions[0][1] < 11 * SAMPLE_RATE
+    assert regions[1][0] > 14 * SAMPLE_RATE
+
+
+def test_end_on_splice_stays_in_its_region():
+    time_map = [(0.0, 1.0), (5.22, 9.5)]
+    result = {
+        "segments": [
+            {
+                "start": 4.0,
+                "end": 5.22,
+                "words": [{"start": 5.0, "end": 5.22}],
+            },
+            {"start": 5.22, "end": 6.0},
+        ]
+    }
+    segments = restore_timestamps(result, time_map)["segments"]
+    assert segments[0]["start"] == pytest.approx(5.0)
+    assert segments[0]["end"] == pytest.approx(6.22)
+    assert segments[0]["words"][0]["end"] == pytest.approx(6.22)
+    assert segments[1]["start"] == pytest.approx(9.5)
+    assert segments[1]["end"] == pytest.approx(10.28)
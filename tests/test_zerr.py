@@ -0,0 +1,44 @@
+import multiprocessing
+import pickle
+
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+import pytest
+
+
+from core.zerr import zraise, ZError
+
+
+def fail(value: int) -> None:
+    try:
+        raise ValueError(f"bad value {value}")
+    except Exception as e:
+        raise zraise(e)
+
+
+def get_error() -> ZError:
+    try:
+        fail(3)
+    except ZError as e:
+        return e
+    raise AssertionError("fail did not raise")
+
+
+def test_pickle_round_trip():
+    error = get_error()
+    restored = pickle.loads(pickle.dumps(error))
+    assert isinstance(restored, ZError)
+    assert str(restored) == str(error)
+    assert "bad value 3" in str(restored)
+    assert restored.function_args == "value=3"
+    assert restored.logged
+
+
+def test_error_crosses_process_pool():
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        with pytest.raises(ZError, match="bad value 7"):
+            pool.submit(fail, 7).result()